@@ -15,13 +15,13 @@ from datetime import datetime, timedelta, UTC
 from zoneinfo import ZoneInfo
 from flask import Flask, jsonify, request, render_template, redirect, url_for, session, flash
 from flask_session import Session as FlaskSession
-from sqlalchemy.orm import Session
+from sqlalchemy.orm import Session, undefer_group
 from sqlalchemy import desc, and_, func
 from config import get_config, TestingConfig # Import TestingConfig
-from database import get_db_session_context
-from models import Sensor, SensorReading
+from database import get_db_session_context, remove_scoped_session
+from models import Sensor, SensorReading, LATEST_READING_FOR_SENSOR
 from error_handling import handle_flask_error, log_info, log_warning, get_error_handler
-from polling_service import PollingService, create_polling_service # Import PollingService
+from polling_service import PollingService, create_polling_service, acquire_polling_lock # Import PollingService
 from auth import auth_manager, require_manager_auth, setup_initial_pin_from_args, AuthenticationError, AccountLockoutError
 from settings_manager import SettingsManager, check_threshold_breach
 from sensorpush_api import SensorPushAPI
@@ -86,7 +86,10 @@ def create_app(config_name=None, config_class=None, start_polling_service=True):
         return local_time.strftime('%Y-%m-%d %H:%M:%S')
     
     # Initialize and start the polling service if requested
-    if start_polling_service:
+    if start_polling_service and not acquire_polling_lock(getattr(config, 'POLLING_LOCK_FILE', None)):
+        log_info("Polling service owned by another worker, not starting it here", "Flask App Factory")
+        app.polling_service = None
+    elif start_polling_service:
         try:
             log_info("Initializing polling service within Flask application", "Flask App Factory")
             app.polling_service = create_polling_service(config_class=config)
@@ -113,6 +116,9 @@ def create_app(config_name=None, config_class=None, start_polling_service=True):
             log_info("Stopping polling service during app context teardown", "Flask App Factory")
             app.polling_service.stop()
     
+    # Release the request's scoped database session
+    app.teardown_appcontext(remove_scoped_session)
+    
     # Register routes on this app instance
     register_routes(app)
     
@@ -137,7 +143,7 @@ def register_routes(app):
             log_info("Retrieving all sensors", "API /api/sensors")
             
             with get_db_session_context() as session:
-                sensors = session.query(Sensor).all()
+                sensors = session.query(Sensor).options(undefer_group('thresholds')).all()
                 
                 log_info(f"Successfully retrieved {len(sensors)} sensors", "API /api/sensors")
                 return jsonify({
@@ -169,10 +175,9 @@ def register_routes(app):
                 
                 for sensor in active_sensors:
                     # Get the latest reading for this sensor
-                    latest_reading = session.query(SensorReading)\
-                        .filter(SensorReading.sensor_id == sensor.sensor_id)\
-                        .order_by(desc(SensorReading.timestamp))\
-                        .first()
+                    latest_reading = session.execute(
+                        LATEST_READING_FOR_SENSOR, {'sensor_id': sensor.sensor_id}
+                    ).scalar_one_or_none()
                     
                     if latest_reading:
                         reading_data = serialize_sensor_reading(latest_reading)
@@ -236,7 +241,7 @@ def register_routes(app):
             
             with get_db_session_context() as session:
                 # Verify sensor exists
-                sensor = session.query(Sensor).filter(Sensor.sensor_id == sensor_id).first()
+                sensor = session.query(Sensor).options(undefer_group('thresholds')).filter(Sensor.sensor_id == sensor_id).first()
                 if not sensor:
                     log_warning(f"Sensor not found: {sensor_id}", "API /api/sensors/history")
                     return jsonify({
@@ -394,8 +399,8 @@ def register_routes(app):
                     # Group by hour and calculate averages using SQLite's strftime function
                     readings = session.query(
                         func.strftime('%Y-%m-%d %H:00:00', SensorReading.timestamp).label('hour'),
-                        func.avg(SensorReading.temperature).label('avg_temperature'),
-                        func.avg(SensorReading.humidity).label('avg_humidity'),
+                        func.avg(SensorReading.temperature, type_=SensorReading.temperature.type).label('avg_temperature'),
+                        func.avg(SensorReading.humidity, type_=SensorReading.humidity.type).label('avg_humidity'),
                         func.avg(SensorReading.battery_voltage).label('battery_voltage')
                     ).filter(and_(
                         SensorReading.sensor_id == sensor_id,
@@ -557,8 +562,8 @@ def register_routes(app):
                         # Get hourly averaged data using SQL aggregation
                         readings = session.query(
                             func.strftime('%Y-%m-%d %H:00:00', SensorReading.timestamp).label('hour'),
-                            func.avg(SensorReading.temperature).label('avg_temperature'),
-                            func.avg(SensorReading.humidity).label('avg_humidity'),
+                            func.avg(SensorReading.temperature, type_=SensorReading.temperature.type).label('avg_temperature'),
+                            func.avg(SensorReading.humidity, type_=SensorReading.humidity.type).label('avg_humidity'),
                             func.avg(SensorReading.battery_voltage).label('battery_voltage')
                         ).filter(and_(
                             SensorReading.sensor_id == sensor_id,
@@ -625,17 +630,16 @@ def register_routes(app):
             
             with get_db_session_context() as session:
                 # Get all active sensors with their latest readings
-                active_sensors = session.query(Sensor).filter(Sensor.active == True).all()
+                active_sensors = session.query(Sensor).options(undefer_group('thresholds')).filter(Sensor.active == True).all()
                 
                 sensors_with_readings = []
                 current_utc_time = datetime.now(UTC)
                 
                 for sensor in active_sensors:
                     # Get the latest reading for this sensor
-                    latest_reading = session.query(SensorReading)\
-                        .filter(SensorReading.sensor_id == sensor.sensor_id)\
-                        .order_by(desc(SensorReading.timestamp))\
-                        .first()
+                    latest_reading = session.execute(
+                        LATEST_READING_FOR_SENSOR, {'sensor_id': sensor.sensor_id}
+                    ).scalar_one_or_none()
                     
                     # Check for threshold breaches
                     threshold_info = check_threshold_breach(sensor, latest_reading)
@@ -677,7 +681,7 @@ def register_routes(app):
             
             with get_db_session_context() as session:
                 # Get sensor information
-                sensor = session.query(Sensor).filter(Sensor.sensor_id == sensor_id).first()
+                sensor = session.query(Sensor).options(undefer_group('thresholds')).filter(Sensor.sensor_id == sensor_id).first()
                 if not sensor:
                     log_warning(f"Sensor not found: {sensor_id}", "Web Interface")
                     return render_template('error.html', error=f"Sensor {sensor_id} not found"), 404
@@ -886,7 +890,7 @@ def register_routes(app):
             
             # GET request - show sensor settings page
             with get_db_session_context() as db_session:
-                sensors = db_session.query(Sensor).all()
+                sensors = db_session.query(Sensor).options(undefer_group('thresholds')).all()
                 
             return render_template('manager_sensor_settings.html',
                                  sensors=sensors,
@@ -986,8 +990,12 @@ def register_routes(app):
             if SettingsManager.set_polling_interval(interval):
                 # Update the polling service with the new interval
                 from flask import current_app
-                if hasattr(current_app, 'polling_service'):
-                    current_app.polling_service.update_polling_interval(interval)
+                # Workers that do not own the poller leave it to the owning
+                # worker's settings check job to apply the persisted value
+                polling_service = getattr(current_app, 'polling_service', None)
+                if polling_service is not None:
+                    polling_service.invalidate_caches()
+                    polling_service.update_polling_interval(interval)
                     log_info(f"Polling interval updated to {interval} minutes and applied to service", "Manager Settings")
                 else:
                     log_info(f"Polling interval updated to {interval} minutes in database", "Manager Settings")
@@ -19,10 +19,13 @@ from sqlalchemy.orm import Session
 from sqlalchemy import desc, and_
 
 from database import get_db_session_context
-from models import ManagerAuth, LoginAttempt, ManagerSession
+from models import ManagerAuth, LoginAttempt, ManagerSession, ACTIVE_MANAGER_SESSION
 from config import get_config
 from error_handling import log_info, log_warning, log_error
 
+# Login attempts kept per IP address; older rows are pruned as new ones arrive
+LOGIN_ATTEMPT_HISTORY = 20
+
 
 class AuthenticationError(Exception):
     """Custom exception for authentication errors."""
@@ -45,6 +48,8 @@ class AuthManager:
         self.config = get_config()
         self.max_attempts = self.config.MAX_LOGIN_ATTEMPTS
         self.session_timeout = self.config.SESSION_TIMEOUT
+        # Always keep enough history for the lockout check to see every failure
+        self.attempt_history = max(LOGIN_ATTEMPT_HISTORY, self.max_attempts)
         
     def hash_pin(self, pin: str) -> str:
         """
@@ -200,7 +205,8 @@ class AuthManager:
             str: Session ID
         """
         session_id = secrets.token_urlsafe(32)
-        expires_at = datetime.now(UTC) + timedelta(seconds=self.session_timeout)
+        now = datetime.now(UTC)
+        expires_at = now + timedelta(seconds=self.session_timeout)
         
         # Deactivate any existing sessions for this IP
         db_session.query(ManagerSession)\
@@ -211,6 +217,7 @@ class AuthManager:
         manager_session = ManagerSession(
             session_id=session_id,
             ip_address=ip_address,
+            created_at=now,
             expires_at=expires_at
         )
         db_session.add(manager_session)
@@ -231,13 +238,11 @@ class AuthManager:
         """
         try:
             with get_db_session_context() as db_session:
-                session_record = db_session.query(ManagerSession)\
-                    .filter(and_(
-                        ManagerSession.session_id == session_id,
-                        ManagerSession.ip_address == ip_address,
-                        ManagerSession.active == True,
-                        ManagerSession.expires_at > datetime.now(UTC)
-                    )).first()
+                session_record = db_session.execute(ACTIVE_MANAGER_SESSION, {
+                    'session_id': session_id,
+                    'ip_address': ip_address,
+                    'now': datetime.now(UTC)
+                }).first()
                 
                 return session_record is not None
                 
@@ -270,12 +275,32 @@ class AuthManager:
             return False
     
     def _record_login_attempt(self, db_session: Session, ip_address: str, success: bool):
-        """Record a login attempt."""
+        """
+        Record a login attempt.
+        
+        Only the newest attempt_history attempts per IP address are kept, so the
+        table stays bounded and the lockout check scans a handful of rows.
+        """
         attempt = LoginAttempt(
             ip_address=ip_address,
             success=success
         )
         db_session.add(attempt)
+        db_session.flush()
+        
+        oldest_kept_id = db_session.query(LoginAttempt.id)\
+            .filter(LoginAttempt.ip_address == ip_address)\
+            .order_by(desc(LoginAttempt.id))\
+            .offset(self.attempt_history - 1)\
+            .limit(1)\
+            .scalar()
+        if oldest_kept_id is not None:
+            db_session.query(LoginAttempt)\
+                .filter(and_(
+                    LoginAttempt.ip_address == ip_address,
+                    LoginAttempt.id < oldest_kept_id
+                )).delete(synchronize_session=False)
+        
         db_session.commit()
     
     def _get_recent_failed_attempts(self, db_session: Session, ip_address: str) -> int:
@@ -24,6 +24,7 @@ class Config:
     SENSORPUSH_USERNAME = os.getenv('SENSORPUSH_USERNAME')
     SENSORPUSH_PASSWORD = os.getenv('SENSORPUSH_PASSWORD')
     SENSORPUSH_API_BASE_URL = os.getenv('SENSORPUSH_API_BASE_URL', 'https://api.sensorpush.com/api/v1')
+    SENSORPUSH_API_RETRIES = int(os.getenv('SENSORPUSH_API_RETRIES', '3'))  # connection retries per request
     logger.info(f"Config - SENSORPUSH_USERNAME: {bool(SENSORPUSH_USERNAME)}")
     logger.info(f"Config - SENSORPUSH_PASSWORD: {bool(SENSORPUSH_PASSWORD)}")
     
@@ -34,10 +35,14 @@ class Config:
     
     # Database Configuration
     DATABASE_URL = os.getenv('DATABASE_URL', 'sqlite:///db/sensor_dashboard.db')
+    DB_POOL_SIZE = int(os.getenv('DB_POOL_SIZE', '10'))
+    DB_MAX_OVERFLOW = int(os.getenv('DB_MAX_OVERFLOW', '20'))
     
     # Application Settings
     DEFAULT_POLLING_INTERVAL = int(os.getenv('DEFAULT_POLLING_INTERVAL', '1'))  # minutes
     DATA_RETENTION_MONTHS = int(os.getenv('DATA_RETENTION_MONTHS', '12'))  # months
+    PURGE_MAINTENANCE_THRESHOLD = int(os.getenv('PURGE_MAINTENANCE_THRESHOLD', '10000'))  # rows purged before running maintenance
+    PURGE_BATCH_SIZE = int(os.getenv('PURGE_BATCH_SIZE', '10000'))  # rows deleted per batch
     
     # Manager Authentication
     MANAGER_PIN_HASH = os.getenv('MANAGER_PIN_HASH')  # Hashed PIN for manager access
@@ -47,6 +52,10 @@ class Config:
     # Logging Configuration
     LOG_LEVEL = os.getenv('LOG_LEVEL', 'DEBUG')
     LOG_FILE = os.getenv('LOG_FILE', 'sensor_dashboard.log')
+    LOG_MAX_BYTES = int(os.getenv('LOG_MAX_BYTES', str(10 * 1024 * 1024)))  # rotate after 10 MB
+    LOG_BACKUP_COUNT = int(os.getenv('LOG_BACKUP_COUNT', '5'))
+    ERROR_QUEUE_ENABLED = os.getenv('ERROR_QUEUE_ENABLED', 'true').lower() == 'true'  # store errors from a background writer
+    POLLING_LOCK_FILE = os.getenv('POLLING_LOCK_FILE', '/tmp/bakery_polling.lock')  # only one worker process polls
     
     @classmethod
     def validate_required_config(cls):
@@ -66,6 +75,11 @@ class Config:
             missing_vars.append('SENSORPUSH_PASSWORD')
             logger.warning("SENSORPUSH_PASSWORD is not set.")
         
+        # A non-positive batch size would make the batched purge loop forever
+        if cls.PURGE_BATCH_SIZE < 1:
+            missing_vars.append('PURGE_BATCH_SIZE (must be at least 1)')
+            logger.warning("PURGE_BATCH_SIZE must be at least 1.")
+        
         return missing_vars
     
     @classmethod
@@ -125,6 +139,9 @@ class TestingConfig(Config):
     DEBUG = True
     DATABASE_URL = 'sqlite:///:memory:'  # In-memory database for tests
     DEFAULT_POLLING_INTERVAL = 1  # Faster polling for tests
+    ERROR_QUEUE_ENABLED = False  # Store errors synchronously so tests can assert on them
+    POLLING_LOCK_FILE = None  # Every test app may start its own polling service
+    SENSORPUSH_API_RETRIES = 0  # Fail fast when tests have no network
     # Explicitly define these for testing to avoid reliance on os.getenv at import time
     SENSORPUSH_USERNAME = 'test_user'
     SENSORPUSH_PASSWORD = 'test_password'
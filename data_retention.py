@@ -7,17 +7,57 @@ data are always retained. It also provides on-demand deletion capabilities.
 """
 
 import logging
+from concurrent.futures import ThreadPoolExecutor, as_completed
 from datetime import datetime, timedelta
 from typing import Optional, Dict, Any, List
 from sqlalchemy.exc import SQLAlchemyError
-from sqlalchemy import and_, func
+from sqlalchemy import and_, func, select, delete, case, text, bindparam, DateTime
 
 from config import Config
-from database import get_db_session_context
+from database import get_db_session_context, run_incremental_vacuum
 from models import SensorReading
 from error_handling import handle_polling_error, log_info, log_warning, log_debug
 
 
+# Dialects that support the batched DELETE ... WHERE id IN (SELECT ... LIMIT) statements below
+_BATCHED_PURGE_DIALECTS = ('sqlite', 'postgresql')
+
+_PURGE_SQL = text(
+    "DELETE FROM sensor_readings WHERE timestamp < :cutoff AND id IN "
+    "(SELECT id FROM sensor_readings WHERE timestamp < :cutoff LIMIT :n)"
+).bindparams(bindparam('cutoff', type_=DateTime))
+
+
+def _delete_readings_in_batches(session, criteria, batch_size: int) -> int:
+    """
+    Delete the readings matching criteria in batches, committing after each one.
+    
+    Args:
+        session: Active database session
+        criteria: SQLAlchemy filter expressions selecting the readings to delete
+        batch_size: Maximum number of rows deleted per batch
+        
+    Returns:
+        int: Total number of readings deleted
+        
+    Raises:
+        ValueError: If batch_size is not positive, which would never end the loop
+    """
+    if batch_size < 1:
+        raise ValueError(f"Batch size must be at least 1, got {batch_size}")
+    
+    batch_ids = select(SensorReading.id).where(*criteria).limit(batch_size).scalar_subquery()
+    statement = delete(SensorReading).where(SensorReading.id.in_(batch_ids))
+    
+    deleted_count = 0
+    while True:
+        batch_deleted = session.execute(statement, execution_options={'synchronize_session': False}).rowcount
+        session.commit()
+        deleted_count += batch_deleted
+        if batch_deleted < batch_size:
+            return deleted_count
+
+
 class DataRetentionError(Exception):
     """Base exception for data retention errors."""
     pass
@@ -74,14 +114,16 @@ class DataRetentionService:
         
         try:
             with get_db_session_context() as session:
-                # Build query for the specific sensor
-                query = session.query(SensorReading).filter(SensorReading.sensor_id == sensor_id)
+                # Build criteria for the specific sensor
+                criteria = [SensorReading.sensor_id == sensor_id]
                 
                 # Apply date filters if provided
                 if start_date:
-                    query = query.filter(SensorReading.timestamp >= start_date)
+                    criteria.append(SensorReading.timestamp >= start_date)
                 if end_date:
-                    query = query.filter(SensorReading.timestamp <= end_date)
+                    criteria.append(SensorReading.timestamp <= end_date)
+                
+                query = session.query(SensorReading).filter(*criteria)
                 
                 # Count records to be deleted
                 records_to_delete = query.count()
@@ -99,8 +141,11 @@ class DataRetentionService:
                 log_info(f"Found {records_to_delete} records to delete for sensor {sensor_id}", "delete_readings_by_sensor")
                 
                 # Delete the records
-                deleted_count = query.delete()
-                session.commit()
+                if session.get_bind().dialect.name in _BATCHED_PURGE_DIALECTS:
+                    deleted_count = _delete_readings_in_batches(session, criteria, self.config.PURGE_BATCH_SIZE)
+                else:
+                    deleted_count = query.delete()
+                    session.commit()
                 
                 log_info(f"Successfully deleted {deleted_count} readings for sensor {sensor_id}", "delete_readings_by_sensor")
                 
@@ -138,6 +183,60 @@ class DataRetentionService:
                 'error_message': error_msg
             }
     
+    def delete_readings_for_sensors(self, sensor_ids: List[str], max_workers: int = 4) -> Dict[str, Any]:
+        """
+        Delete all readings for several sensors concurrently.
+
+        Each sensor is handled by delete_readings_by_sensor in its own database
+        session. On backends with concurrent writers the deletions run in a
+        thread pool; SQLite allows only a single writer at a time, so there the
+        sensors are processed one after another without a pool.
+
+        Args:
+            sensor_ids: IDs of the sensors whose readings should be deleted
+            max_workers: Maximum number of concurrent deletions
+
+        Returns:
+            dict: Results of the deletion operation including:
+                - success: bool indicating if every per-sensor deletion succeeded
+                - records_deleted: int total number of records deleted
+                - sensor_ids: list of sensor IDs processed
+                - results: dict mapping each sensor ID to its delete_readings_by_sensor result
+                - error_message: str error message if any deletion failed
+        """
+        log_info(f"Starting on-demand deletion for {len(sensor_ids)} sensors", "delete_readings_for_sensors")
+
+        results = {}
+        if self.config.DATABASE_URL.startswith('sqlite'):
+            for sensor_id in sensor_ids:
+                results[sensor_id] = self.delete_readings_by_sensor(sensor_id)
+        elif sensor_ids:
+            with ThreadPoolExecutor(max_workers=max(1, min(max_workers, len(sensor_ids)))) as executor:
+                futures = {
+                    executor.submit(self.delete_readings_by_sensor, sensor_id): sensor_id
+                    for sensor_id in sensor_ids
+                }
+                for future in as_completed(futures):
+                    results[futures[future]] = future.result()
+
+        failed_sensor_ids = [sensor_id for sensor_id, result in results.items() if not result['success']]
+        records_deleted = sum(result['records_deleted'] for result in results.values())
+
+        if failed_sensor_ids:
+            error_msg = f"Deletion failed for sensors: {', '.join(failed_sensor_ids)}"
+            log_warning(error_msg, "delete_readings_for_sensors")
+        else:
+            error_msg = None
+            log_info(f"Successfully deleted {records_deleted} readings for {len(sensor_ids)} sensors", "delete_readings_for_sensors")
+
+        return {
+            'success': not failed_sensor_ids,
+            'records_deleted': records_deleted,
+            'sensor_ids': sensor_ids,
+            'results': results,
+            'error_message': error_msg
+        }
+
     def delete_readings_by_date_range(self, start_date: datetime, end_date: datetime,
                                      sensor_ids: Optional[List[str]] = None) -> Dict[str, Any]:
         """
@@ -160,17 +259,19 @@ class DataRetentionService:
         
         try:
             with get_db_session_context() as session:
-                # Build query for the date range
-                query = session.query(SensorReading).filter(
+                # Build criteria for the date range
+                criteria = [
                     and_(
                         SensorReading.timestamp >= start_date,
                         SensorReading.timestamp <= end_date
                     )
-                )
+                ]
                 
                 # Apply sensor filter if provided
                 if sensor_ids:
-                    query = query.filter(SensorReading.sensor_id.in_(sensor_ids))
+                    criteria.append(SensorReading.sensor_id.in_(sensor_ids))
+                
+                query = session.query(SensorReading).filter(*criteria)
                 
                 # Count records to be deleted
                 records_to_delete = query.count()
@@ -188,8 +289,11 @@ class DataRetentionService:
                 log_info(f"Found {records_to_delete} records to delete in date range", "delete_readings_by_date_range")
                 
                 # Delete the records
-                deleted_count = query.delete()
-                session.commit()
+                if session.get_bind().dialect.name in _BATCHED_PURGE_DIALECTS:
+                    deleted_count = _delete_readings_in_batches(session, criteria, self.config.PURGE_BATCH_SIZE)
+                else:
+                    deleted_count = query.delete()
+                    session.commit()
                 
                 log_info(f"Successfully deleted {deleted_count} readings in date range", "delete_readings_by_date_range")
                 
@@ -303,7 +407,7 @@ class DataRetentionService:
             raise DataRetentionError(f"Failed to get sensor summary for {sensor_id}: {e}")
 
 
-def purge_old_readings(config_class=None) -> Dict[str, Any]:
+def purge_old_readings(config_class=None, batch_size: Optional[int] = None) -> Dict[str, Any]:
     """
     Purge old sensor readings based on the configured retention period.
     
@@ -311,8 +415,12 @@ def purge_old_readings(config_class=None) -> Dict[str, Any]:
     configured in config.py, but ensures that at least 6 months of data are always
     retained, even if DATA_RETENTION_MONTHS is set lower than 6.
     
+    On SQLite and PostgreSQL the rows are removed in batches of batch_size using
+    a prepared DELETE statement, committing after each batch.
+    
     Args:
         config_class: Configuration class to use (defaults to Config)
+        batch_size: Maximum number of rows deleted per batch (defaults to PURGE_BATCH_SIZE)
         
     Returns:
         dict: Results of the purging operation including:
@@ -320,6 +428,7 @@ def purge_old_readings(config_class=None) -> Dict[str, Any]:
             - records_deleted: int number of records deleted
             - cutoff_date: datetime cutoff date used for purging
             - retention_months: int actual retention months used
+            - maintenance_ran: bool whether post-purge database maintenance ran
             - error_message: str error message if operation failed
             
     Raises:
@@ -327,6 +436,8 @@ def purge_old_readings(config_class=None) -> Dict[str, Any]:
     """
     config = config_class or Config
     logger = logging.getLogger(__name__)
+    if batch_size is None:
+        batch_size = config.PURGE_BATCH_SIZE
     
     # Ensure minimum 6 months retention
     retention_months = max(config.DATA_RETENTION_MONTHS, 6)
@@ -350,29 +461,62 @@ def purge_old_readings(config_class=None) -> Dict[str, Any]:
                     'records_deleted': 0,
                     'cutoff_date': cutoff_date,
                     'retention_months': retention_months,
+                    'maintenance_ran': False,
                     'error_message': None
                 }
             
             log_info(f"Found {records_to_delete} records to purge (older than {cutoff_date.isoformat()})", "purge_old_readings")
             
-            # Delete old records
-            deleted_count = session.query(SensorReading).filter(
-                SensorReading.timestamp < cutoff_date
-            ).delete()
+            if batch_size <= 0:
+                # A non-positive LIMIT would never end the batch loop below
+                error_msg = f"Invalid purge batch size {batch_size}; it must be at least 1"
+                log_warning(error_msg, "purge_old_readings")
+                return {
+                    'success': False,
+                    'records_deleted': 0,
+                    'cutoff_date': cutoff_date,
+                    'retention_months': retention_months,
+                    'maintenance_ran': False,
+                    'error_message': error_msg
+                }
             
-            # Commit the deletion
-            session.commit()
+            if session.get_bind().dialect.name in _BATCHED_PURGE_DIALECTS:
+                # Delete in bounded batches, committing each one so locks are held briefly
+                deleted_count = 0
+                params = {'cutoff': cutoff_date, 'n': batch_size}
+                while True:
+                    batch_deleted = session.execute(_PURGE_SQL, params).rowcount
+                    session.commit()
+                    deleted_count += batch_deleted
+                    if batch_deleted < batch_size:
+                        break
+            else:
+                # Delete old records
+                deleted_count = session.query(SensorReading).filter(
+                    SensorReading.timestamp < cutoff_date
+                ).delete()
+                
+                # Commit the deletion
+                session.commit()
             
             log_info(f"Successfully purged {deleted_count} old sensor readings", "purge_old_readings")
-            
-            return {
-                'success': True,
-                'records_deleted': deleted_count,
-                'cutoff_date': cutoff_date,
-                'retention_months': retention_months,
-                'error_message': None
-            }
-            
+            bind = session.get_bind()
+        
+        # Reclaim freed pages and refresh planner statistics after large purges,
+        # once the purge session has committed and released its connection
+        maintenance_ran = False
+        if deleted_count > config.PURGE_MAINTENANCE_THRESHOLD:
+            maintenance_ran = _run_post_purge_maintenance(bind)
+        
+        return {
+            'success': True,
+            'records_deleted': deleted_count,
+            'cutoff_date': cutoff_date,
+            'retention_months': retention_months,
+            'maintenance_ran': maintenance_ran,
+            'error_message': None
+        }
+        
     except SQLAlchemyError as e:
         error_id = handle_polling_error(e, "Database error during data purging")
         error_msg = f"Database error during data purging with error ID: {error_id}"
@@ -383,6 +527,7 @@ def purge_old_readings(config_class=None) -> Dict[str, Any]:
             'records_deleted': 0,
             'cutoff_date': cutoff_date,
             'retention_months': retention_months,
+            'maintenance_ran': False,
             'error_message': error_msg
         }
         
@@ -396,10 +541,46 @@ def purge_old_readings(config_class=None) -> Dict[str, Any]:
             'records_deleted': 0,
             'cutoff_date': cutoff_date,
             'retention_months': retention_months,
+            'maintenance_ran': False,
             'error_message': error_msg
         }
 
 
+def _run_post_purge_maintenance(bind) -> bool:
+    """
+    Run database maintenance after a large purge.
+    
+    On SQLite free pages are released with an incremental vacuum and the WAL
+    is checkpointed; on PostgreSQL the table statistics are refreshed. The
+    statements run on their own connection after the purge has committed, and
+    failures are logged and never fail the purge itself.
+    
+    Args:
+        bind: Engine the purge ran against
+        
+    Returns:
+        bool: True if maintenance ran, False otherwise
+    """
+    try:
+        dialect_name = bind.dialect.name
+        if dialect_name == 'sqlite':
+            run_incremental_vacuum()
+            with bind.connect() as conn:
+                conn.exec_driver_sql("PRAGMA wal_checkpoint(TRUNCATE)")
+        elif dialect_name == 'postgresql':
+            with bind.begin() as conn:
+                conn.exec_driver_sql("ANALYZE sensor_readings")
+        else:
+            return False
+        
+        log_info(f"Post-purge maintenance completed on {dialect_name}", "purge_old_readings")
+        return True
+        
+    except Exception as e:
+        log_warning(f"Post-purge maintenance failed: {e}", "purge_old_readings")
+        return False
+
+
 def get_data_retention_stats(config_class=None) -> Dict[str, Any]:
     """
     Get statistics about current data retention and storage.
@@ -422,25 +603,23 @@ def get_data_retention_stats(config_class=None) -> Dict[str, Any]:
     
     try:
         with get_db_session_context() as session:
-            # Get total record count
-            total_records = session.query(func.count(SensorReading.id)).scalar() or 0
-            
-            # Get oldest and newest record dates
-            oldest_record = session.query(func.min(SensorReading.timestamp)).scalar()
-            newest_record = session.query(func.max(SensorReading.timestamp)).scalar()
-            
-            # Count records eligible for purging
-            records_eligible_for_purge = session.query(SensorReading).filter(
-                SensorReading.timestamp < cutoff_date
-            ).count()
+            # Gather counts and date bounds in a single round-trip
+            total_records, oldest_record, newest_record, records_eligible_for_purge = session.execute(
+                select(
+                    func.count(SensorReading.id),
+                    func.min(SensorReading.timestamp),
+                    func.max(SensorReading.timestamp),
+                    func.sum(case((SensorReading.timestamp < cutoff_date, 1), else_=0))
+                )
+            ).one()
             
             return {
-                'total_records': total_records,
+                'total_records': total_records or 0,
                 'oldest_record_date': oldest_record,
                 'newest_record_date': newest_record,
                 'retention_months': config.DATA_RETENTION_MONTHS,
                 'effective_retention_months': retention_months,
-                'records_eligible_for_purge': records_eligible_for_purge,
+                'records_eligible_for_purge': records_eligible_for_purge or 0,
                 'cutoff_date': cutoff_date
             }
             
@@ -6,25 +6,102 @@ It provides functions to initialize the SQLite database and get SQLAlchemy sessi
 """
 
 import os
+import logging
+import threading
 from contextlib import contextmanager
-from sqlalchemy import create_engine, text
-from sqlalchemy.orm import sessionmaker, Session
+from sqlalchemy import Float, create_engine, event, inspect, text
+from sqlalchemy.orm import sessionmaker, scoped_session, Session
+from sqlalchemy.pool import QueuePool, StaticPool
+from sqlalchemy.engine import Connection
 from sqlalchemy.exc import SQLAlchemyError
 from config import get_config
-from models import Base
+from models import Base, SensorReading, READING_VALUE_SCALE
 
 # Get configuration
 config = get_config()
+logger = logging.getLogger(__name__)
+
+# Bump whenever migrate_database() gains a new migration step
+CURRENT_SCHEMA_VERSION = 6
+
+
+def _is_file_sqlite(database_url: str) -> bool:
+    """Return True if the URL points at an on-disk SQLite database."""
+    return database_url.startswith('sqlite') and ':memory:' not in database_url and 'mode=memory' not in database_url
+
+
+# In-memory SQLite must share a single connection; everything else gets a sized pool
+if config.DATABASE_URL.startswith('sqlite') and not _is_file_sqlite(config.DATABASE_URL):
+    pool_options = {"poolclass": StaticPool}
+else:
+    pool_options = {
+        "poolclass": QueuePool,
+        "pool_size": config.DB_POOL_SIZE,
+        "max_overflow": config.DB_MAX_OVERFLOW,
+        "pool_recycle": 3600,  # seconds
+        "pool_pre_ping": True
+    }
+
+# psycopg2 folds executemany INSERTs into multi-row VALUES pages and batches
+# the remaining statements; other drivers do not accept these options
+if config.DATABASE_URL.startswith(('postgresql://', 'postgresql+psycopg2://')):
+    driver_options = {
+        "executemany_mode": "values_plus_batch",
+        "insertmanyvalues_page_size": 1000,
+        "executemany_batch_page_size": 500
+    }
+else:
+    driver_options = {}
 
 # Create SQLAlchemy engine using DATABASE_URL from config
 engine = create_engine(
     config.DATABASE_URL,
     echo=config.DEBUG,  # Enable SQL logging in debug mode
-    connect_args={"check_same_thread": False} if config.DATABASE_URL.startswith('sqlite') else {}
+    connect_args={"check_same_thread": False} if config.DATABASE_URL.startswith('sqlite') else {},
+    query_cache_size=1200,  # compiled statement cache entries (default 500)
+    **pool_options,
+    **driver_options
 )
 
-# Create sessionmaker
-SessionLocal = sessionmaker(autocommit=False, autoflush=False, bind=engine)
+# Connectivity probe shared by every test_db_connection() call
+_PING_SQL = text("SELECT 1")
+
+
+if config.DATABASE_URL.startswith('sqlite') and not _is_file_sqlite(config.DATABASE_URL):
+    @event.listens_for(engine, "connect")
+    def _set_sqlite_memory_pragmas(dbapi_connection, connection_record):
+        """Enforce foreign keys (and ON DELETE CASCADE) on in-memory SQLite too."""
+        cursor = dbapi_connection.cursor()
+        cursor.execute("PRAGMA foreign_keys=ON")
+        cursor.close()
+
+
+if _is_file_sqlite(config.DATABASE_URL):
+    @event.listens_for(engine, "connect")
+    def _set_sqlite_pragmas(dbapi_connection, connection_record):
+        """
+        Tune every new SQLite connection for concurrent reads and writes.
+        
+        WAL journaling lets the polling service write while web requests read,
+        and synchronous=NORMAL is safe under WAL while avoiding an fsync per commit.
+        In-memory databases are skipped as they cannot use WAL.
+        """
+        cursor = dbapi_connection.cursor()
+        cursor.execute("PRAGMA journal_mode=WAL")
+        cursor.execute("PRAGMA synchronous=NORMAL")
+        cursor.execute("PRAGMA temp_store=MEMORY")
+        cursor.execute("PRAGMA mmap_size=268435456")  # 256 MB
+        cursor.execute("PRAGMA cache_size=-64000")  # ~64 MB
+        cursor.execute("PRAGMA foreign_keys=ON")
+        cursor.close()
+
+
+# Create sessionmaker; SessionLocal hands out one session per thread (i.e. per request)
+_session_factory = sessionmaker(autocommit=False, autoflush=False, bind=engine)
+SessionLocal = scoped_session(_session_factory)
+
+# Tracks how deeply get_db_session_context() is nested on the current thread
+_session_state = threading.local()
 
 
 def init_database():
@@ -42,6 +119,10 @@ def init_database():
         SQLAlchemyError: If there's an error during database initialization
     """
     try:
+        # Let SQLite track free pages so they can be reclaimed incrementally
+        if _is_file_sqlite(config.DATABASE_URL):
+            _enable_incremental_auto_vacuum()
+        
         # Create all tables defined in the models
         Base.metadata.create_all(bind=engine)
         
@@ -49,29 +130,165 @@ def init_database():
         if config.DATABASE_URL.startswith('sqlite:///'):
             db_path = config.DATABASE_URL.replace('sqlite:///', '')
             if os.path.exists(db_path):
-                print(f"Database initialized successfully at: {db_path}")
+                logger.info(f"Database initialized successfully at: {db_path}")
             else:
-                print(f"Warning: Database file not found at expected path: {db_path}")
+                logger.warning(f"Database file not found at expected path: {db_path}")
                 return False
         else:
-            print("Database tables initialized successfully")
+            logger.info("Database tables initialized successfully")
         
         # Run database migrations to ensure schema is up to date
         migration_success = migrate_database()
         if not migration_success:
-            print("Warning: Database migrations failed")
+            logger.warning("Database migrations failed")
             return False
             
         return True
         
     except SQLAlchemyError as e:
-        print(f"Error initializing database: {e}")
+        logger.error(f"Error initializing database: {e}")
         raise
     except Exception as e:
-        print(f"Unexpected error during database initialization: {e}")
+        logger.error(f"Unexpected error during database initialization: {e}")
         raise
 
 
+def _enable_incremental_auto_vacuum():
+    """
+    Switch an on-disk SQLite database to incremental auto_vacuum.
+    
+    The mode must be set before tables exist, or followed by a VACUUM to take
+    effect on an existing file, so the VACUUM only runs when the mode changes.
+    Failures are reported but never block initialization.
+    """
+    try:
+        raw_connection = engine.raw_connection()
+        try:
+            driver_connection = raw_connection.driver_connection
+            mode = driver_connection.execute("PRAGMA auto_vacuum").fetchone()[0]
+            if mode != 2:  # 2 = INCREMENTAL
+                logger.info("Enabling incremental auto_vacuum on SQLite database...")
+                driver_connection.executescript("PRAGMA auto_vacuum=INCREMENTAL; VACUUM;")
+        finally:
+            raw_connection.close()
+    except Exception as e:
+        logger.warning(f"Could not enable incremental auto_vacuum: {e}")
+
+
+def run_incremental_vacuum(pages: int = 1000) -> bool:
+    """
+    Return up to `pages` free pages from the SQLite file to the filesystem.
+    
+    Only has an effect on on-disk SQLite databases created with incremental
+    auto_vacuum (see init_database).
+    
+    Args:
+        pages: Maximum number of free pages to reclaim
+        
+    Returns:
+        bool: True if the vacuum step ran, False if skipped or it failed
+    """
+    if not _is_file_sqlite(config.DATABASE_URL):
+        return False
+    
+    try:
+        raw_connection = engine.raw_connection()
+        try:
+            # executescript steps the pragma to completion rather than one page
+            raw_connection.driver_connection.executescript(f"PRAGMA incremental_vacuum({int(pages)});")
+        finally:
+            raw_connection.close()
+        return True
+    except Exception as e:
+        logger.warning(f"Incremental vacuum failed: {e}")
+        return False
+
+
+def _get_table_columns(connection: Connection, table_name: str) -> set:
+    """
+    Return the set of column names currently defined on a table.
+    
+    Args:
+        connection: Active database connection
+        table_name: Name of the table to inspect
+        
+    Returns:
+        set: Column names, empty if the table does not exist
+    """
+    inspector = inspect(connection)
+    if not inspector.has_table(table_name):
+        return set()
+    return {column['name'] for column in inspector.get_columns(table_name)}
+
+
+def _get_float_columns(connection: Connection, table_name: str) -> set:
+    """Return the names of a table's columns currently declared as floating point."""
+    inspector = inspect(connection)
+    if not inspector.has_table(table_name):
+        return set()
+    return {column['name'] for column in inspector.get_columns(table_name)
+            if isinstance(column['type'], Float)}
+
+
+def _readings_cascade_on_sensor_delete(connection: Connection) -> bool:
+    """Return True if sensor_readings.sensor_id is declared ON DELETE CASCADE."""
+    return any(row[2] == 'sensors' and row[6] == 'CASCADE'
+               for row in connection.execute(text("PRAGMA foreign_key_list(sensor_readings)")))
+
+
+def _rebuild_readings_table(connection: Connection) -> int:
+    """
+    Recreate sensor_readings from the model so its foreign key cascades deletes.
+    
+    SQLite cannot alter a constraint in place: the old table is renamed, the
+    model's table (with its indexes) is created, the rows whose sensor still
+    exists are copied across and the old table is dropped. Must run inside the
+    caller's transaction.
+    
+    Returns:
+        int: Number of readings copied
+    """
+    old_columns = _get_table_columns(connection, 'sensor_readings')
+    columns = ', '.join(column.name for column in SensorReading.__table__.columns if column.name in old_columns)
+    
+    # Index names stay attached to the renamed table, so free them up first
+    for index in inspect(connection).get_indexes('sensor_readings'):
+        connection.execute(text(f"DROP INDEX IF EXISTS {index['name']}"))
+    
+    connection.execute(text("ALTER TABLE sensor_readings RENAME TO sensor_readings_old"))
+    SensorReading.__table__.create(connection)
+    copied = connection.execute(text(
+        f"INSERT INTO sensor_readings ({columns}) SELECT {columns} FROM sensor_readings_old "
+        "WHERE sensor_id IN (SELECT sensor_id FROM sensors)"
+    )).rowcount
+    connection.execute(text("DROP TABLE sensor_readings_old"))
+    return copied
+
+
+def _create_missing_indexes(connection: Connection) -> list:
+    """
+    Create indexes declared on the models that an existing table lacks.
+    
+    create_all() only creates indexes together with a new table, so tables
+    from an older schema get them here.
+    
+    Returns:
+        list: Names of the indexes that were created
+    """
+    inspector = inspect(connection)
+    created = []
+    for table in Base.metadata.sorted_tables:
+        if not table.indexes or not inspector.has_table(table.name):
+            continue
+        existing = {index['name'] for index in inspector.get_indexes(table.name)}
+        columns = {column['name'] for column in inspector.get_columns(table.name)}
+        for index in table.indexes:
+            if index.name not in existing and all(column.name in columns for column in index.columns):
+                index.create(connection)
+                created.append(index.name)
+    return created
+
+
 def migrate_database():
     """
     Perform database migrations to ensure schema is up to date.
@@ -80,67 +297,145 @@ def migrate_database():
     Currently handles:
     - Adding battery_voltage column to sensor_readings table if missing
     - Adding level column to errors table if missing
+    - Adding count and last_seen columns to errors table if missing
+    - Creating model indexes missing from existing tables
+    - Rescaling float temperature/humidity readings to fixed-point hundredths
+    - Removing duplicate readings so (sensor_id, timestamp) can be made unique
+    - Rebuilding sensor_readings so sensor deletes cascade to its readings
+    
+    The schema version is recorded in SQLite's user_version pragma, so once a
+    database is up to date later startups (e.g. each gunicorn worker) skip the
+    column checks entirely. All changes run on a plain Core connection inside
+    one BEGIN IMMEDIATE transaction and are committed together on exit.
+    
+    Both mechanisms are SQLite-only, so other backends are skipped; their
+    tables are created by init_database() with the current schema.
     
     Returns:
         bool: True if migrations completed successfully, False otherwise
     """
+    if engine.dialect.name != 'sqlite':
+        logger.info(f"Schema migrations only apply to SQLite - skipping on {engine.dialect.name}")
+        return True
+    
     try:
-        with get_db_session_context() as session:
+        with engine.begin() as conn:
+            schema_version = conn.execute(text("PRAGMA user_version")).scalar()
+            if schema_version is not None and schema_version >= CURRENT_SCHEMA_VERSION:
+                logger.info(f"Database schema is at version {schema_version} - no migrations needed")
+                return True
+            
+            # Take the write lock once so every ALTER lands in a single transaction,
+            # then re-check in case another worker migrated while we waited
+            conn.exec_driver_sql("BEGIN IMMEDIATE")
+            schema_version = conn.execute(text("PRAGMA user_version")).scalar()
+            if schema_version is not None and schema_version >= CURRENT_SCHEMA_VERSION:
+                logger.info(f"Database schema is at version {schema_version} - no migrations needed")
+                return True
+            
             migrations_performed = []
             
+            # Read each table's columns once instead of probing column by column
+            reading_columns = _get_table_columns(conn, 'sensor_readings')
+            error_columns = _get_table_columns(conn, 'errors')
+            
             # Check if battery_voltage column exists in sensor_readings table
-            try:
-                session.execute(text("SELECT battery_voltage FROM sensor_readings LIMIT 1"))
-                print("Database schema check: battery_voltage column exists")
-            except Exception:
-                # Column doesn't exist, need to add it
-                print("Adding missing battery_voltage column to sensor_readings table...")
-                session.execute(text("ALTER TABLE sensor_readings ADD COLUMN battery_voltage FLOAT"))
+            if 'battery_voltage' in reading_columns:
+                logger.debug("Database schema check: battery_voltage column exists")
+            else:
+                logger.info("Adding missing battery_voltage column to sensor_readings table...")
+                conn.execute(text("ALTER TABLE sensor_readings ADD COLUMN battery_voltage FLOAT"))
                 migrations_performed.append("Added battery_voltage column to sensor_readings")
             
             # Check if level column exists in errors table
-            try:
-                session.execute(text("SELECT level FROM errors LIMIT 1"))
-                print("Database schema check: level column exists in errors table")
-            except Exception:
-                # Column doesn't exist, need to add it
-                print("Adding missing level column to errors table...")
-                session.execute(text("ALTER TABLE errors ADD COLUMN level STRING DEFAULT 'ERROR'"))
+            if 'level' in error_columns:
+                logger.debug("Database schema check: level column exists in errors table")
+            else:
+                logger.info("Adding missing level column to errors table...")
+                conn.execute(text("ALTER TABLE errors ADD COLUMN level STRING DEFAULT 'ERROR'"))
                 migrations_performed.append("Added level column to errors")
             
             # Check if source column exists in errors table
-            try:
-                session.execute(text("SELECT source FROM errors LIMIT 1"))
-                print("Database schema check: source column exists in errors table")
-            except Exception:
-                # Column doesn't exist, need to add it
-                print("Adding missing source column to errors table...")
-                session.execute(text("ALTER TABLE errors ADD COLUMN source STRING DEFAULT 'application'"))
+            if 'source' in error_columns:
+                logger.debug("Database schema check: source column exists in errors table")
+            else:
+                logger.info("Adding missing source column to errors table...")
+                conn.execute(text("ALTER TABLE errors ADD COLUMN source STRING DEFAULT 'application'"))
                 migrations_performed.append("Added source column to errors")
             
-            # Commit all migrations
+            # Check if repeat tracking columns exist in errors table
+            if 'count' in error_columns:
+                logger.debug("Database schema check: count column exists in errors table")
+            else:
+                logger.info("Adding missing count column to errors table...")
+                conn.execute(text("ALTER TABLE errors ADD COLUMN count INTEGER NOT NULL DEFAULT 1"))
+                migrations_performed.append("Added count column to errors")
+            
+            if 'last_seen' in error_columns:
+                logger.debug("Database schema check: last_seen column exists in errors table")
+            else:
+                logger.info("Adding missing last_seen column to errors table...")
+                conn.execute(text("ALTER TABLE errors ADD COLUMN last_seen DATETIME"))
+                migrations_performed.append("Added last_seen column to errors")
+            
+            # Readings written before fixed-point storage hold plain floats; tables
+            # created since declare the columns as SMALLINT and need no rescale
+            if schema_version is None or schema_version < 4:
+                for column in sorted({'temperature', 'humidity'} & _get_float_columns(conn, 'sensor_readings')):
+                    logger.info(f"Rescaling sensor_readings.{column} to fixed-point hundredths...")
+                    conn.execute(text(
+                        f"UPDATE sensor_readings SET {column} = CAST(ROUND({column} * {READING_VALUE_SCALE}) AS INTEGER)"
+                    ))
+                    migrations_performed.append(f"Rescaled sensor_readings.{column}")
+            
+            # The per-sensor timestamp index became unique; drop repeated samples
+            # (keeping the first stored) and the old non-unique index so the
+            # unique one is created below
+            if (schema_version is None or schema_version < 5) and {'sensor_id', 'timestamp'} <= reading_columns:
+                result = conn.execute(text(
+                    "DELETE FROM sensor_readings WHERE id NOT IN "
+                    "(SELECT MIN(id) FROM sensor_readings GROUP BY sensor_id, timestamp)"
+                ))
+                if result.rowcount:
+                    migrations_performed.append(f"Removed {result.rowcount} duplicate sensor readings")
+                conn.execute(text("DROP INDEX IF EXISTS ix_sensor_readings_sensor_ts"))
+            
+            # Sensor deletes are cascaded by the database; tables from before
+            # the foreign key declared ON DELETE CASCADE are rebuilt with it
+            if ((schema_version is None or schema_version < 6) and reading_columns
+                    and _get_table_columns(conn, 'sensors')
+                    and not _readings_cascade_on_sensor_delete(conn)):
+                logger.info("Rebuilding sensor_readings with ON DELETE CASCADE...")
+                copied = _rebuild_readings_table(conn)
+                migrations_performed.append(f"Rebuilt sensor_readings with cascading sensor deletes ({copied} readings)")
+            
+            for index_name in _create_missing_indexes(conn):
+                logger.info(f"Created missing index {index_name}")
+                migrations_performed.append(f"Added index {index_name}")
+            
+            # Record the schema version; engine.begin() commits everything on exit
+            conn.execute(text(f"PRAGMA user_version = {CURRENT_SCHEMA_VERSION}"))
             if migrations_performed:
-                session.commit()
-                print(f"Successfully completed migrations: {', '.join(migrations_performed)}")
+                logger.info(f"Successfully completed migrations: {', '.join(migrations_performed)}")
             else:
-                print("Database schema is up to date - no migrations needed")
+                logger.info("Database schema is up to date - no migrations needed")
             
             return True
                 
     except SQLAlchemyError as e:
-        print(f"Error during database migration: {e}")
+        logger.error(f"Error during database migration: {e}")
         return False
     except Exception as e:
-        print(f"Unexpected error during database migration: {e}")
+        logger.error(f"Unexpected error during database migration: {e}")
         return False
 
 
 def get_db_session() -> Session:
     """
-    Get a new SQLAlchemy session.
+    Get the SQLAlchemy session for the current thread.
     
     Returns:
-        Session: A new SQLAlchemy session instance
+        Session: The thread-scoped SQLAlchemy session instance
         
     Note:
         The caller is responsible for closing the session when done.
@@ -162,14 +457,32 @@ def get_db_session_context():
             # Use session here
             sensors = session.query(Sensor).all()
             # Session is automatically closed when exiting the context
+    
+    Note:
+        The outermost context on a thread reuses the thread-scoped session.
+        Nested contexts get their own independent session so that closing
+        them does not detach objects still in use by the outer block.
     """
-    session = SessionLocal()
+    depth = getattr(_session_state, 'depth', 0)
+    session = SessionLocal() if depth == 0 else _session_factory()
+    _session_state.depth = depth + 1
     try:
         yield session
     finally:
+        _session_state.depth = depth
         session.close()
 
 
+def remove_scoped_session(exception=None):
+    """
+    Discard the session bound to the current thread.
+    
+    Registered as a Flask teardown_appcontext handler so every request
+    starts with a fresh scoped session.
+    """
+    SessionLocal.remove()
+
+
 def close_db_connection():
     """
     Close the database engine and all connections.
@@ -179,32 +492,34 @@ def close_db_connection():
     """
     try:
         engine.dispose()
-        print("Database connections closed successfully")
+        logger.info("Database connections closed successfully")
     except Exception as e:
-        print(f"Error closing database connections: {e}")
+        logger.error(f"Error closing database connections: {e}")
 
 
 def test_db_connection():
     """
     Test the database connection.
     
+    Checks a connection out of the pool and runs a trivial query, without
+    building an ORM session.
+    
     Returns:
         bool: True if connection is successful, False otherwise
     """
     try:
-        with get_db_session_context() as session:
-            # Try to execute a simple query
-            from sqlalchemy import text
-            session.execute(text("SELECT 1"))
+        with engine.connect() as conn:
+            conn.scalar(_PING_SQL)
             return True
     except Exception as e:
-        print(f"Database connection test failed: {e}")
+        logger.warning(f"Database connection test failed: {e}")
         return False
 
 
-# Initialize database on module import if not in testing mode
-if config.FLASK_ENV != 'testing':
+# Initialize database once per process on import if not in testing mode;
+# the flag lives in the module globals so it survives importlib.reload()
+if config.FLASK_ENV != 'testing' and not globals().get('_initialized', False):
     try:
-        init_database()
+        _initialized = init_database()
     except Exception as e:
-        print(f"Failed to initialize database on module import: {e}")
\ No newline at end of file
+        logger.error(f"Failed to initialize database on module import: {e}")
\ No newline at end of file
@@ -7,6 +7,7 @@ This script will try different endpoint variations to find the correct Status en
 
 import sys
 import logging
+from concurrent.futures import ThreadPoolExecutor, as_completed
 from config import Config
 from sensorpush_api import SensorPushAPI, SensorPushAPIError, AuthenticationError, APIConnectionError
 
@@ -17,6 +18,24 @@ logging.basicConfig(
 )
 logger = logging.getLogger(__name__)
 
+def _probe_endpoint(api, method, endpoint):
+    """Request a single endpoint variation and return its decoded JSON body."""
+    logger.info(f"Testing {method} {endpoint}...")
+    
+    if method == 'GET':
+        response = api.make_authenticated_request(
+            method='GET',
+            endpoint=endpoint
+        )
+    else:
+        response = api.make_authenticated_request(
+            method='POST',
+            endpoint=endpoint,
+            json={}
+        )
+    
+    return response.json()
+
 def test_endpoint_variations():
     """Test different endpoint variations to find the correct Status endpoint."""
     try:
@@ -44,32 +63,26 @@ def test_endpoint_variations():
             ('POST', 'gateways/status'),
         ]
         
-        for method, endpoint in endpoints_to_test:
-            try:
-                logger.info(f"Testing {method} {endpoint}...")
-                
-                if method == 'GET':
-                    response = api.make_authenticated_request(
-                        method='GET',
-                        endpoint=endpoint
-                    )
-                else:
-                    response = api.make_authenticated_request(
-                        method='POST',
-                        endpoint=endpoint,
-                        json={}
-                    )
-                
-                data = response.json()
-                logger.info(f"✓ {method} {endpoint} - SUCCESS!")
-                logger.info(f"Response keys: {list(data.keys()) if isinstance(data, dict) else 'Not a dict'}")
-                
-                # If we get here, this endpoint works
-                return True
-                
-            except Exception as e:
-                logger.debug(f"✗ {method} {endpoint} - Failed: {e}")
-                continue
+        # Probe all variations concurrently over the one authenticated session
+        working_endpoints = []
+        with ThreadPoolExecutor(max_workers=len(endpoints_to_test)) as executor:
+            futures = {
+                executor.submit(_probe_endpoint, api, method, endpoint): (method, endpoint)
+                for method, endpoint in endpoints_to_test
+            }
+            
+            for future in as_completed(futures):
+                method, endpoint = futures[future]
+                try:
+                    data = future.result()
+                    logger.info(f"✓ {method} {endpoint} - SUCCESS!")
+                    logger.info(f"Response keys: {list(data.keys()) if isinstance(data, dict) else 'Not a dict'}")
+                    working_endpoints.append((method, endpoint))
+                except Exception as e:
+                    logger.debug(f"✗ {method} {endpoint} - Failed: {e}")
+        
+        if working_endpoints:
+            return True
         
         logger.error("No working status endpoint found")
         return False
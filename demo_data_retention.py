@@ -7,6 +7,7 @@ purging and on-demand deletion of sensor readings.
 """
 
 import sys
+from concurrent.futures import ThreadPoolExecutor
 from datetime import datetime, timedelta
 from data_retention import DataRetentionService
 from config import Config
@@ -19,57 +20,68 @@ def main():
     service = DataRetentionService()
     print("✓ DataRetentionService initialized")
     
+    # For demo purposes, we'll try a few common sensor IDs
+    demo_sensor_ids = ['sensor1', 'sensor2', 'test_sensor']
+    
     try:
-        # 1. Validate configuration
-        print("\n1. Validating retention configuration...")
-        config_validation = service.validate_config()
-        print(f"   Configuration valid: {config_validation['is_valid']}")
-        print(f"   Configured retention: {config_validation['configured_months']} months")
-        print(f"   Effective retention: {config_validation['effective_months']} months")
-        if config_validation['warnings']:
-            for warning in config_validation['warnings']:
-                print(f"   ⚠️  Warning: {warning}")
+        # The read-only steps are independent, so run them side by side. Each
+        # worker thread gets its own scoped session from the service.
+        with ThreadPoolExecutor(max_workers=4) as ex:
+            f_cfg = ex.submit(service.validate_config)
+            f_stats = ex.submit(service.get_retention_stats)
+            
+            # 1. Validate configuration
+            print("\n1. Validating retention configuration...")
+            config_validation = f_cfg.result()
+            print(f"   Configuration valid: {config_validation['is_valid']}")
+            print(f"   Configured retention: {config_validation['configured_months']} months")
+            print(f"   Effective retention: {config_validation['effective_months']} months")
+            if config_validation['warnings']:
+                for warning in config_validation['warnings']:
+                    print(f"   ⚠️  Warning: {warning}")
         
-        # 2. Get current retention statistics
-        print("\n2. Getting current retention statistics...")
-        stats = service.get_retention_stats()
-        print(f"   Total records: {stats['total_records']}")
-        print(f"   Oldest record: {stats['oldest_record_date']}")
-        print(f"   Newest record: {stats['newest_record_date']}")
-        print(f"   Records eligible for purge: {stats['records_eligible_for_purge']}")
+            # 2. Get current retention statistics
+            print("\n2. Getting current retention statistics...")
+            stats = f_stats.result()
+            print(f"   Total records: {stats['total_records']}")
+            print(f"   Oldest record: {stats['oldest_record_date']}")
+            print(f"   Newest record: {stats['newest_record_date']}")
+            print(f"   Records eligible for purge: {stats['records_eligible_for_purge']}")
         
-        # 3. Demonstrate automatic purging
-        print("\n3. Running automatic purge of old readings...")
-        purge_result = service.purge_old_readings()
-        if purge_result['success']:
-            print(f"   ✓ Purge successful: {purge_result['records_deleted']} records deleted")
-            print(f"   Cutoff date: {purge_result['cutoff_date']}")
-            print(f"   Retention period: {purge_result['retention_months']} months")
-        else:
-            print(f"   ❌ Purge failed: {purge_result['error_message']}")
+            # 3. Demonstrate automatic purging (only once the stats above
+            # have been read, so they describe the data before the purge)
+            print("\n3. Running automatic purge of old readings...")
+            purge_result = service.purge_old_readings()
+            if purge_result['success']:
+                print(f"   ✓ Purge successful: {purge_result['records_deleted']} records deleted")
+                print(f"   Cutoff date: {purge_result['cutoff_date']}")
+                print(f"   Retention period: {purge_result['retention_months']} months")
+            else:
+                print(f"   ❌ Purge failed: {purge_result['error_message']}")
         
-        # 4. Demonstrate sensor data summary
-        print("\n4. Getting sensor data summaries...")
-        # Get a list of sensors from the stats (this is a simplified approach)
-        if stats['total_records'] > 0:
-            # For demo purposes, we'll try a few common sensor IDs
-            demo_sensor_ids = ['sensor1', 'sensor2', 'test_sensor']
-            for sensor_id in demo_sensor_ids:
-                try:
-                    summary = service.get_sensor_data_summary(sensor_id)
-                    if summary['total_records'] > 0:
-                        print(f"   Sensor {sensor_id}:")
-                        print(f"     Records: {summary['total_records']}")
-                        print(f"     Date range: {summary['date_range_days']} days")
-                        print(f"     Oldest: {summary['oldest_record_date']}")
-                        print(f"     Newest: {summary['newest_record_date']}")
-                        break
-                except Exception:
-                    continue
+            # 4. Demonstrate sensor data summary; submitted only now so the
+            # summaries describe the data left after the purge
+            print("\n4. Getting sensor data summaries...")
+            f_summaries = {sid: ex.submit(service.get_sensor_data_summary, sid)
+                           for sid in demo_sensor_ids}
+            # Get a list of sensors from the stats (this is a simplified approach)
+            if stats['total_records'] > 0:
+                for sensor_id in demo_sensor_ids:
+                    try:
+                        summary = f_summaries[sensor_id].result()
+                        if summary['total_records'] > 0:
+                            print(f"   Sensor {sensor_id}:")
+                            print(f"     Records: {summary['total_records']}")
+                            print(f"     Date range: {summary['date_range_days']} days")
+                            print(f"     Oldest: {summary['oldest_record_date']}")
+                            print(f"     Newest: {summary['newest_record_date']}")
+                            break
+                    except Exception:
+                        continue
+                else:
+                    print("   No sensor data found for demo sensor IDs")
             else:
-                print("   No sensor data found for demo sensor IDs")
-        else:
-            print("   No sensor data available for summary")
+                print("   No sensor data available for summary")
         
         # 5. Demonstrate on-demand deletion (commented out to avoid deleting real data)
         print("\n5. On-demand deletion capabilities:")
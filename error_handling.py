@@ -5,17 +5,130 @@ This module provides centralized error handling, logging configuration, and
 error storage functionality for the entire application.
 """
 
+import atexit
 import logging
+import os
+import queue
+import secrets
+import sys
+import threading
+import time
 import traceback
-import uuid
-from datetime import datetime
-from typing import Optional, Dict, Any
-from contextlib import contextmanager
+from collections import Counter, OrderedDict
+from datetime import datetime, UTC
+from logging.handlers import RotatingFileHandler
+from typing import Optional, Dict, Any, Tuple
 
+from sqlalchemy import update
 from sqlalchemy.exc import SQLAlchemyError
 from config import get_config
 from database import get_db_session_context
-from models import Error
+from models import Error, bulk_insert
+
+
+# Configured loggers keyed by (LOG_FILE, LOG_LEVEL, DEBUG) so handlers are only built once
+_LOGGERS: Dict[Tuple[Any, ...], logging.Logger] = {}
+
+# Write buffer for the log file; records below ERROR are flushed in 64 KB chunks
+LOG_BUFFER_SIZE = 65536
+
+# Longest a buffered record below ERROR waits before it is flushed to the file
+LOG_FLUSH_INTERVAL = 2.0  # seconds
+
+# Background error writer limits
+ERROR_QUEUE_MAXSIZE = 10000
+ERROR_FLUSH_BATCH_SIZE = 500
+ERROR_FLUSH_INTERVAL = 0.5  # seconds
+
+# Identical errors repeated within this window bump the stored row's count instead of inserting
+ERROR_DEDUP_TTL = 60  # seconds
+ERROR_DEDUP_SIZE = 256
+
+
+class BufferedRotatingFileHandler(RotatingFileHandler):
+    """
+    RotatingFileHandler that buffers writes instead of flushing every record.
+    
+    The file is opened with a LOG_BUFFER_SIZE buffer. It is flushed when a
+    record at ERROR or above is written, LOG_FLUSH_INTERVAL seconds after the
+    first record buffered since the last flush, on rollover, and when logging
+    shuts down (logging.shutdown runs at exit and closes every handler). The
+    file size is tracked here in encoded bytes because the stock rollover
+    check seeks the stream, which would flush it on every record.
+    """
+    
+    _flush_timer: Optional[threading.Timer] = None
+    
+    def _open(self):
+        stream = open(self.baseFilename, self.mode, buffering=LOG_BUFFER_SIZE,
+                      encoding=self.encoding, errors=self.errors)
+        try:
+            self._bytes_written = os.path.getsize(self.baseFilename)
+        except OSError:
+            self._bytes_written = 0
+        return stream
+    
+    def _timed_flush(self):
+        with self.lock:
+            self._flush_timer = None
+            if self.stream is not None:
+                self.stream.flush()
+    
+    def emit(self, record):
+        try:
+            msg = self.format(record) + self.terminator
+            msg_bytes = len(msg.encode(self.encoding or 'utf-8', self.errors or 'strict'))
+            if self.stream is None:
+                self.stream = self._open()
+            if 0 < self.maxBytes <= self._bytes_written + msg_bytes and self._bytes_written > 0:
+                self.doRollover()
+                if self.stream is None:
+                    self.stream = self._open()
+            self.stream.write(msg)
+            self._bytes_written += msg_bytes
+            if record.levelno >= logging.ERROR:
+                self.stream.flush()
+            elif self._flush_timer is None:
+                self._flush_timer = threading.Timer(LOG_FLUSH_INTERVAL, self._timed_flush)
+                self._flush_timer.daemon = True
+                self._flush_timer.start()
+        except RecursionError:
+            raise
+        except Exception:
+            self.handleError(record)
+    
+    def close(self):
+        with self.lock:
+            if self._flush_timer is not None:
+                self._flush_timer.cancel()
+                self._flush_timer = None
+        super().close()
+
+
+class _LazyTraceback:
+    """
+    Formats an exception's traceback on first use and caches the text.
+    
+    Passed as a logging argument so the traceback is only rendered when a
+    record is actually emitted, and so the background writer can format it
+    off the request thread.
+    """
+    __slots__ = ('_exc_info', '_text')
+    
+    def __init__(self, exc_info):
+        self._exc_info = exc_info
+        self._text = None
+    
+    def __str__(self) -> str:
+        text = self._text
+        if text is None:
+            exc_type, exc_value, exc_tb = self._exc_info
+            if exc_type is None:
+                text = 'NoneType: None\n'
+            else:
+                text = ''.join(traceback.format_exception(exc_type, exc_value, exc_tb))
+            self._text = text
+        return text
 
 
 class ErrorHandler:
@@ -36,6 +149,19 @@ class ErrorHandler:
         self.config = config_class or get_config()
         self.logger = self._setup_logging()
         
+        # Recently stored errors: dedup key -> (error_id, first seen monotonic time)
+        self._recent_errors: OrderedDict = OrderedDict()
+        self._recent_lock = threading.Lock()
+        
+        # Errors are buffered and written in batches by a daemon thread when enabled
+        self._error_queue: Optional[queue.Queue] = None
+        self._flush_thread: Optional[threading.Thread] = None
+        if self.config.ERROR_QUEUE_ENABLED:
+            self._error_queue = queue.Queue(maxsize=ERROR_QUEUE_MAXSIZE)
+            self._flush_thread = threading.Thread(target=self._flush_loop, name='error-writer', daemon=True)
+            self._flush_thread.start()
+            atexit.register(self._drain_and_close)
+        
     def _setup_logging(self) -> logging.Logger:
         """
         Set up logging configuration based on config settings.
@@ -43,11 +169,17 @@ class ErrorHandler:
         Returns:
             logging.Logger: Configured logger instance
         """
+        key = (self.config.LOG_FILE, self.config.LOG_LEVEL, self.config.DEBUG)
+        cached_logger = _LOGGERS.get(key)
+        if cached_logger is not None:
+            return cached_logger
+        
         # Create logger
         logger = logging.getLogger('bakery_sensors')
         
         # Avoid adding multiple handlers if already configured
         if logger.handlers:
+            _LOGGERS[key] = logger
             return logger
             
         # Set log level
@@ -60,9 +192,15 @@ class ErrorHandler:
             datefmt='%Y-%m-%d %H:%M:%S'
         )
         
-        # Create file handler
+        # Create file handler; delay defers opening the file until the first record
         try:
-            file_handler = logging.FileHandler(self.config.LOG_FILE, encoding='utf-8')
+            file_handler = BufferedRotatingFileHandler(
+                self.config.LOG_FILE,
+                maxBytes=self.config.LOG_MAX_BYTES,
+                backupCount=self.config.LOG_BACKUP_COUNT,
+                encoding='utf-8',
+                delay=True
+            )
             file_handler.setLevel(log_level)
             file_handler.setFormatter(formatter)
             logger.addHandler(file_handler)
@@ -80,6 +218,7 @@ class ErrorHandler:
         # Prevent propagation to root logger
         logger.propagate = False
         
+        _LOGGERS[key] = logger
         return logger
     
     def generate_error_id(self) -> str:
@@ -89,7 +228,7 @@ class ErrorHandler:
         Returns:
             str: Unique error ID in format 'ERR-XXXXXXXX'
         """
-        return f"ERR-{uuid.uuid4().hex[:8].upper()}"
+        return f"ERR-{secrets.token_hex(4).upper()}"
     
     def log_and_store_error(
         self,
@@ -112,23 +251,33 @@ class ErrorHandler:
         Returns:
             str: Unique error ID for the stored error
         """
-        error_id = self.generate_error_id()
-        
-        # Get stack trace
-        stack_trace = traceback.format_exc()
-        
         # Build error message
         error_message = str(exception)
         if context:
             error_message = f"{context}: {error_message}"
         if additional_data:
             error_message += f" | Additional data: {additional_data}"
-            
+        
+        # A repeat of a recently stored error only bumps that record's count
+        dedup_key = hash((type(exception).__name__, str(exception), context))
+        repeated_error_id = self._lookup_recent_error(dedup_key)
+        if repeated_error_id is not None:
+            self.logger.error("Error %s repeated: %s", repeated_error_id, error_message)
+            try:
+                self._record_repeat(repeated_error_id)
+            except Exception as db_error:
+                self.logger.critical(
+                    f"Failed to update repeat count for error {repeated_error_id}: {db_error}"
+                )
+            return repeated_error_id
+        
+        error_id = self.generate_error_id()
+        
+        # Capture the stack trace; it is only formatted when logged or stored
+        stack_trace = _LazyTraceback(sys.exc_info())
+        
         # Log the error
-        self.logger.error(
-            f"Error {error_id}: {error_message}\n"
-            f"Stack trace:\n{stack_trace}"
-        )
+        self.logger.error("Error %s: %s\nStack trace:\n%s", error_id, error_message, stack_trace)
         
         # Determine error level if not provided
         if level is None:
@@ -146,9 +295,13 @@ class ErrorHandler:
         if source is None:
             source = context if context else 'application'
         
-        # Store in database
+        # Store in database; only deduplicate against errors that were stored or queued
         try:
-            self._store_error_in_db(error_id, error_message, stack_trace, level, source)
+            if self._error_queue is not None:
+                self._queue_error(error_id, error_message, stack_trace, level, source)
+            else:
+                self._store_error_in_db(error_id, error_message, str(stack_trace), level, source)
+            self._remember_error(dedup_key, error_id)
         except Exception as db_error:
             # If we can't store in DB, at least log it
             self.logger.critical(
@@ -177,7 +330,7 @@ class ErrorHandler:
                     stack_trace=stack_trace,
                     level=level,
                     source=source,
-                    timestamp=datetime.utcnow()
+                    timestamp=datetime.now(UTC)
                 )
                 session.add(error_record)
                 session.commit()
@@ -186,6 +339,159 @@ class ErrorHandler:
             # Re-raise SQLAlchemy errors so caller can handle them
             raise e
     
+    def _lookup_recent_error(self, dedup_key: int) -> Optional[str]:
+        """Return the error ID stored for dedup_key within ERROR_DEDUP_TTL, if any."""
+        with self._recent_lock:
+            entry = self._recent_errors.get(dedup_key)
+            if entry is None:
+                return None
+            error_id, first_seen = entry
+            if time.monotonic() - first_seen >= ERROR_DEDUP_TTL:
+                del self._recent_errors[dedup_key]
+                return None
+            return error_id
+    
+    def _remember_error(self, dedup_key: int, error_id: str):
+        """Record a newly stored error, evicting the oldest beyond ERROR_DEDUP_SIZE."""
+        with self._recent_lock:
+            self._recent_errors[dedup_key] = (error_id, time.monotonic())
+            self._recent_errors.move_to_end(dedup_key)
+            while len(self._recent_errors) > ERROR_DEDUP_SIZE:
+                self._recent_errors.popitem(last=False)
+    
+    def _forget_errors(self, error_ids: set):
+        """Stop deduplicating against errors whose rows failed to be written."""
+        with self._recent_lock:
+            for dedup_key in [key for key, (error_id, _) in self._recent_errors.items() if error_id in error_ids]:
+                del self._recent_errors[dedup_key]
+    
+    def _record_repeat(self, error_id: str):
+        """
+        Count another occurrence of an already stored error.
+        
+        Queued through the background writer when it is enabled so the update
+        is applied after the original row has been inserted.
+        """
+        seen_at = datetime.now(UTC)
+        if self._error_queue is not None:
+            try:
+                self._error_queue.put_nowait(('repeat', {'error_id': error_id, 'last_seen': seen_at}))
+                return
+            except queue.Full:
+                pass
+        
+        with get_db_session_context() as session:
+            session.execute(
+                update(Error)
+                .where(Error.error_id == error_id)
+                .values(count=Error.count + 1, last_seen=seen_at)
+            )
+            session.commit()
+    
+    def _queue_error(self, error_id: str, message: str, stack_trace: _LazyTraceback, level: str, source: str):
+        """
+        Hand an error to the background writer.
+        
+        Falls back to a synchronous insert when the queue is full so no error is dropped.
+        """
+        try:
+            self._error_queue.put_nowait(('insert', {
+                'error_id': error_id,
+                'message': message,
+                'stack_trace': stack_trace,
+                'level': level,
+                'source': source,
+                'timestamp': datetime.now(UTC)
+            }))
+        except queue.Full:
+            self._store_error_in_db(error_id, message, str(stack_trace), level, source)
+    
+    def _flush_loop(self):
+        """
+        Drain the error queue, writing up to ERROR_FLUSH_BATCH_SIZE errors per
+        transaction or whatever arrived within ERROR_FLUSH_INTERVAL.
+        
+        A None item is the shutdown signal; anything collected before it is written.
+        """
+        while True:
+            item = self._error_queue.get()
+            if item is None:
+                return
+            
+            batch = [item]
+            stop = False
+            deadline = time.monotonic() + ERROR_FLUSH_INTERVAL
+            while len(batch) < ERROR_FLUSH_BATCH_SIZE:
+                remaining = deadline - time.monotonic()
+                if remaining <= 0:
+                    break
+                try:
+                    item = self._error_queue.get(timeout=remaining)
+                except queue.Empty:
+                    break
+                if item is None:
+                    stop = True
+                    break
+                batch.append(item)
+            
+            self._write_error_batch(batch)
+            if stop:
+                return
+    
+    def _write_error_batch(self, batch: list):
+        """
+        Write a batch of queued errors in a single transaction.
+        
+        New errors are bulk inserted first, then repeats are applied as one
+        count update per error ID.
+        
+        Args:
+            batch: ('insert' | 'repeat', mapping) items produced by _queue_error and _record_repeat
+        """
+        rows = [payload for kind, payload in batch if kind == 'insert']
+        repeats = Counter()
+        last_seen = {}
+        for kind, payload in batch:
+            if kind == 'repeat':
+                repeats[payload['error_id']] += 1
+                last_seen[payload['error_id']] = payload['last_seen']
+        
+        try:
+            for row in rows:
+                row['stack_trace'] = str(row['stack_trace'])
+            with get_db_session_context() as session:
+                if rows:
+                    bulk_insert(session, Error, rows)
+                for error_id, occurrences in repeats.items():
+                    session.execute(
+                        update(Error)
+                        .where(Error.error_id == error_id)
+                        .values(count=Error.count + occurrences, last_seen=last_seen[error_id])
+                    )
+                session.commit()
+        except Exception as e:
+            # Never route this back through log_and_store_error, which would re-queue it
+            self.logger.critical(
+                f"Failed to store {len(batch)} errors in database: {e}\n"
+                f"Error IDs: {', '.join(sorted({payload['error_id'] for _, payload in batch}))}"
+            )
+            self._forget_errors({row['error_id'] for row in rows})
+    
+    def _drain_and_close(self, timeout: float = 5.0):
+        """
+        Stop the background writer after it has flushed every queued error.
+        
+        Args:
+            timeout: Maximum seconds to wait for the writer to finish
+        """
+        if self._flush_thread is None or not self._flush_thread.is_alive():
+            return
+        try:
+            self._error_queue.put(None, timeout=timeout)
+        except queue.Full:
+            return
+        self._flush_thread.join(timeout)
+    
     def get_user_friendly_error(self, error_id: str) -> Dict[str, Any]:
         """
         Generate a user-friendly error response.
@@ -203,38 +509,56 @@ class ErrorHandler:
             'message': f'Please contact support with error ID: {error_id}'
         }
     
-    def log_info(self, message: str, context: Optional[str] = None):
+    def log_info(self, message: str, context: Optional[str] = None, *args):
         """
         Log an informational message.
         
         Args:
             message: The message to log
             context: Optional context information
+            *args: Values for %-style placeholders in message, interpolated
+                   only if the record is actually emitted
         """
-        log_message = f"{context}: {message}" if context else message
-        self.logger.info(log_message)
+        if context and args:
+            self.logger.info("%s: " + message, context, *args)
+        elif context:
+            self.logger.info("%s: %s", context, message)
+        else:
+            self.logger.info(message, *args)
     
-    def log_warning(self, message: str, context: Optional[str] = None):
+    def log_warning(self, message: str, context: Optional[str] = None, *args):
         """
         Log a warning message.
         
         Args:
             message: The message to log
             context: Optional context information
+            *args: Values for %-style placeholders in message, interpolated
+                   only if the record is actually emitted
         """
-        log_message = f"{context}: {message}" if context else message
-        self.logger.warning(log_message)
+        if context and args:
+            self.logger.warning("%s: " + message, context, *args)
+        elif context:
+            self.logger.warning("%s: %s", context, message)
+        else:
+            self.logger.warning(message, *args)
     
-    def log_debug(self, message: str, context: Optional[str] = None):
+    def log_debug(self, message: str, context: Optional[str] = None, *args):
         """
         Log a debug message.
         
         Args:
             message: The message to log
             context: Optional context information
+            *args: Values for %-style placeholders in message, interpolated
+                   only if the record is actually emitted
         """
-        log_message = f"{context}: {message}" if context else message
-        self.logger.debug(log_message)
+        if context and args:
+            self.logger.debug("%s: " + message, context, *args)
+        elif context:
+            self.logger.debug("%s: %s", context, message)
+        else:
+            self.logger.debug(message, *args)
 
 
 # Global error handler instance
@@ -254,32 +578,44 @@ def get_error_handler() -> ErrorHandler:
     return _error_handler
 
 
-@contextmanager
-def error_context(context_name: str, additional_data: Optional[Dict[str, Any]] = None):
+class error_context:
     """
     Context manager for handling errors with automatic logging and storage.
     
+    A plain class rather than a generator-based context manager, so entering
+    and leaving it costs no generator frame on hot request paths.
+    
     Args:
         context_name: Name of the context where errors might occur
         additional_data: Additional data to include if an error occurs
         
-    Yields:
-        str: Error ID if an error occurs, None otherwise
+    Attributes:
+        error_id: Error ID once an error has been logged, None otherwise
         
     Example:
-        with error_context("API call", {"endpoint": "/api/sensors"}) as error_id:
-            if error_id:
-                return get_error_handler().get_user_friendly_error(error_id)
-            # Your code here
+        ctx = error_context("API call", {"endpoint": "/api/sensors"})
+        try:
+            with ctx:
+                # Your code here
+        except Exception:
+            return get_error_handler().get_user_friendly_error(ctx.error_id)
     """
-    error_id = None
-    try:
-        yield error_id
-    except Exception as e:
-        error_handler = get_error_handler()
-        error_id = error_handler.log_and_store_error(e, context_name, additional_data)
+    __slots__ = ('context_name', 'additional_data', 'error_id')
+    
+    def __init__(self, context_name: str, additional_data: Optional[Dict[str, Any]] = None):
+        self.context_name = context_name
+        self.additional_data = additional_data
+        self.error_id = None
+    
+    def __enter__(self):
+        return self
+    
+    def __exit__(self, exc_type, exc_value, tb):
+        if isinstance(exc_value, Exception):
+            error_handler = get_error_handler()
+            self.error_id = error_handler.log_and_store_error(exc_value, self.context_name, self.additional_data)
         # Re-raise the exception so the caller can handle it
-        raise
+        return False
 
 
 def handle_flask_error(exception: Exception, context: str = "Flask request") -> tuple:
@@ -325,19 +661,19 @@ def handle_polling_error(exception: Exception, context: str = "Polling service")
 
 
 # Convenience functions for logging
-def log_info(message: str, context: Optional[str] = None):
-    """Log an informational message."""
-    get_error_handler().log_info(message, context)
+def log_info(message: str, context: Optional[str] = None, *args):
+    """Log an informational message; *args fill %-style placeholders in message lazily."""
+    get_error_handler().log_info(message, context, *args)
 
 
-def log_warning(message: str, context: Optional[str] = None):
-    """Log a warning message."""
-    get_error_handler().log_warning(message, context)
+def log_warning(message: str, context: Optional[str] = None, *args):
+    """Log a warning message; *args fill %-style placeholders in message lazily."""
+    get_error_handler().log_warning(message, context, *args)
 
 
-def log_debug(message: str, context: Optional[str] = None):
-    """Log a debug message."""
-    get_error_handler().log_debug(message, context)
+def log_debug(message: str, context: Optional[str] = None, *args):
+    """Log a debug message; *args fill %-style placeholders in message lazily."""
+    get_error_handler().log_debug(message, context, *args)
 
 
 def log_error(exception: Exception, context: Optional[str] = None, additional_data: Optional[Dict[str, Any]] = None, level: Optional[str] = None, source: Optional[str] = None) -> str:
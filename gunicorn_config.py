@@ -1,13 +1,12 @@
 # gunicorn_config.py
 import logging
 import os
-from app import create_app
-from config import ProductionConfig, DevelopmentConfig
 
 def post_fork(server, worker):
     """
     Called just after a worker has been forked.
     The polling service is now automatically initialized within the Flask app factory.
+    Only the worker holding POLLING_LOCK_FILE starts it; the others skip polling.
     """
     logging.info(f"Worker {worker.pid} forked. Polling service will be initialized automatically by Flask app.")
 
@@ -22,25 +21,28 @@ def worker_abort(worker):
     """
     Called when a worker receives the SIGABRT signal.
     The polling service cleanup is now handled by Flask app teardown handlers.
+    The polling lock is released when the worker process exits, so the next
+    worker to start takes over polling.
     """
     logging.warning(f"Worker {worker.pid} aborted. Polling service cleanup handled by Flask app teardown.")
 
 # Set the log level for Gunicorn itself to match the application's log level
 # This might be overridden by Gunicorn's own logging configuration
+_LOG_LEVELS = {
+    'debug': logging.DEBUG,
+    'info': logging.INFO,
+    'warning': logging.WARNING,
+    'error': logging.ERROR,
+    'critical': logging.CRITICAL,
+}
+
 loglevel = os.environ.get('LOG_LEVEL', 'INFO').lower()
-if loglevel == 'debug':
-    logging.getLogger('gunicorn.error').setLevel(logging.DEBUG)
-    logging.getLogger('gunicorn.access').setLevel(logging.DEBUG)
-elif loglevel == 'info':
-    logging.getLogger('gunicorn.error').setLevel(logging.INFO)
-    logging.getLogger('gunicorn.access').setLevel(logging.INFO)
-elif loglevel == 'warning':
-    logging.getLogger('gunicorn.error').setLevel(logging.WARNING)
-    logging.getLogger('gunicorn.access').setLevel(logging.WARNING)
-elif loglevel == 'error':
-    logging.getLogger('gunicorn.error').setLevel(logging.ERROR)
-elif loglevel == 'critical':
-    logging.getLogger('gunicorn.error').setLevel(logging.CRITICAL)
+level = _LOG_LEVELS.get(loglevel)
+if level is not None:
+    logging.getLogger('gunicorn.error').setLevel(level)
+    # Access logs are only tuned down to WARNING so they are not silenced at error/critical
+    if level <= logging.WARNING:
+        logging.getLogger('gunicorn.access').setLevel(level)
 
 # You can also set other Gunicorn options here, e.g., number of workers
 # workers = 2 # Example: set number of workers
\ No newline at end of file
@@ -0,0 +1,68 @@
+#!/usr/bin/env python3
+"""
+Migration: add timestamp indexes to the sensor_readings table.
+
+Data purging and date range deletion filter sensor_readings on timestamp
+(optionally per sensor). Without an index each purge batch scans the whole
+table; these indexes let the batched DELETE read only the rows it removes.
+
+Usage:
+    python migrate_add_readings_timestamp_index.py
+"""
+
+import sys
+
+from sqlalchemy import text
+from sqlalchemy.exc import SQLAlchemyError
+
+from database import engine
+from error_handling import log_info
+
+
+# (index name, indexed columns) created on sensor_readings. Per-sensor purges
+# use the unique (sensor_id, timestamp) index created by migrate_database().
+READING_INDEXES = [
+    ('ix_sensor_readings_ts', 'timestamp'),
+]
+
+
+def add_timestamp_indexes() -> bool:
+    """
+    Create the sensor_readings timestamp indexes if they do not exist yet.
+
+    Statistics are refreshed afterwards so the query planner picks the new
+    indexes for purge scans straight away.
+
+    Returns:
+        bool: True if the migration completed successfully, False otherwise
+    """
+    try:
+        with engine.begin() as conn:
+            for index_name, columns in READING_INDEXES:
+                print(f"Ensuring index {index_name} on sensor_readings({columns})...")
+                conn.execute(text(f"CREATE INDEX IF NOT EXISTS {index_name} ON sensor_readings ({columns})"))
+
+            conn.execute(text("ANALYZE sensor_readings"))
+
+        log_info("Sensor reading timestamp indexes are in place", "migrate_add_readings_timestamp_index")
+        return True
+
+    except SQLAlchemyError as e:
+        print(f"❌ Failed to add sensor reading indexes: {e}")
+        return False
+
+
+def main():
+    """Main entry point for the migration."""
+    print("🏭 BakerySensors Migration: sensor_readings timestamp indexes")
+    print("=" * 50)
+
+    if not add_timestamp_indexes():
+        return 1
+
+    print("✅ Migration completed successfully")
+    return 0
+
+
+if __name__ == "__main__":
+    sys.exit(main())
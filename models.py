@@ -4,12 +4,119 @@ Database models for the Bakery Sensors application.
 This module defines SQLAlchemy models for the sensors, sensor_readings, errors, and authentication tables.
 """
 
+import zlib
 from datetime import datetime, UTC
-from sqlalchemy import Column, Integer, String, Float, Boolean, DateTime, ForeignKey, Text
-from sqlalchemy.ext.declarative import declarative_base
-from sqlalchemy.orm import relationship
+from itertools import islice
+from typing import List, Optional
+from sqlalchemy import Integer, SmallInteger, String, Float, Boolean, DateTime, ForeignKey, Text, LargeBinary, Index, bindparam, insert, func, lambda_stmt, select, true
+from sqlalchemy.dialects.postgresql import insert as postgresql_insert
+from sqlalchemy.dialects.sqlite import insert as sqlite_insert
+from sqlalchemy.orm import DeclarativeBase, Mapped, mapped_column, relationship
+from sqlalchemy.types import TypeDecorator
 
-Base = declarative_base()
+
+class Base(DeclarativeBase):
+    """Declarative base shared by all models."""
+    pass
+
+
+# Rows sent per executemany INSERT by bulk_insert
+BULK_PAGE = 1000
+
+# Readings are narrow and arrive in large polls, so they use bigger pages
+READING_INSERT_CHUNK = 5000
+
+# Temperature and humidity are stored as integer hundredths
+READING_VALUE_SCALE = 100
+
+
+def decode_trace(value):
+    """
+    Decode a stored stack trace.
+    
+    Compressed traces are stored as bytes; rows written before compression was
+    introduced hold plain text and are returned unchanged.
+    """
+    if isinstance(value, (bytes, bytearray, memoryview)):
+        return zlib.decompress(value).decode('utf-8')
+    return value
+
+
+class CompressedText(TypeDecorator):
+    """
+    Text column stored zlib-compressed.
+    
+    Stack traces are large and highly repetitive, so they shrink several times
+    over when compressed. The attribute still reads and writes as str.
+    """
+    impl = LargeBinary
+    cache_ok = True
+    
+    def process_bind_param(self, value, dialect):
+        if not value:
+            return None
+        return zlib.compress(value.encode('utf-8'))
+    
+    def process_result_value(self, value, dialect):
+        if value is None:
+            return None
+        return decode_trace(value)
+
+
+def bulk_insert(session, model, mappings, page_size=BULK_PAGE) -> int:
+    """
+    Insert plain dict rows with executemany INSERT statements, one per page.
+    
+    Meant for the high-volume tables (SensorReading, Error and LoginAttempt);
+    unlike per-object session.add() or the legacy bulk_save_objects(), no ORM
+    instances are built. Pending ORM objects (e.g. newly added sensors) are
+    flushed first so the rows can reference them. The caller owns the
+    transaction and commits once all rows are written.
+    
+    Args:
+        session: Database session
+        model: Mapped class to insert into
+        mappings: Iterable of column-name dicts
+        page_size: Number of rows sent per INSERT statement
+        
+    Returns:
+        int: Number of rows inserted
+    """
+    session.flush()
+    mappings = iter(mappings)
+    inserted = 0
+    while True:
+        page = list(islice(mappings, page_size))
+        if not page:
+            return inserted
+        session.execute(insert(model), page)
+        inserted += len(page)
+
+
+class ScaledFloat(TypeDecorator):
+    """
+    Float stored as a fixed-point SMALLINT.
+    
+    Sensor values only carry two decimals, so they are kept as integer
+    hundredths: two bytes per value instead of an eight-byte float. The
+    attribute still reads and writes as float.
+    """
+    impl = SmallInteger
+    cache_ok = True
+    
+    def __init__(self, scale=READING_VALUE_SCALE):
+        super().__init__()
+        self.scale = scale
+    
+    def process_bind_param(self, value, dialect):
+        if value is None:
+            return None
+        return int(round(value * self.scale))
+    
+    def process_result_value(self, value, dialect):
+        if value is None:
+            return None
+        return value / self.scale
 
 
 class Sensor(Base):
@@ -21,18 +128,24 @@ class Sensor(Base):
     """
     __tablename__ = 'sensors'
     
-    sensor_id = Column(String, primary_key=True)
-    name = Column(String, nullable=False)
-    active = Column(Boolean, nullable=False, default=True)
-    min_temp = Column(Float, nullable=False)
-    max_temp = Column(Float, nullable=False)
-    min_humidity = Column(Float, nullable=False)
-    max_humidity = Column(Float, nullable=False)
+    sensor_id: Mapped[str] = mapped_column(String, primary_key=True)
+    name: Mapped[str] = mapped_column(String, nullable=False)
+    active: Mapped[bool] = mapped_column(Boolean, nullable=False, default=True)
+    # Thresholds are only loaded (together) when first accessed, or up front with
+    # .options(undefer_group('thresholds')) on queries that display or check them
+    min_temp: Mapped[float] = mapped_column(Float, nullable=False, deferred=True, deferred_group='thresholds')
+    max_temp: Mapped[float] = mapped_column(Float, nullable=False, deferred=True, deferred_group='thresholds')
+    min_humidity: Mapped[float] = mapped_column(Float, nullable=False, deferred=True, deferred_group='thresholds')
+    max_humidity: Mapped[float] = mapped_column(Float, nullable=False, deferred=True, deferred_group='thresholds')
     
     # Relationship to sensor readings
-    readings = relationship("SensorReading", back_populates="sensor", cascade="all, delete-orphan")
+    readings: Mapped[List["SensorReading"]] = relationship("SensorReading", back_populates="sensor", cascade="all, delete-orphan", passive_deletes=True)
     
     def __repr__(self):
+        return f"<Sensor(sensor_id='{self.sensor_id}')>"
+    
+    def describe(self) -> str:
+        """Return every significant field, for debugging output."""
         return f"<Sensor(sensor_id='{self.sensor_id}', name='{self.name}', active={self.active})>"
 
 
@@ -44,27 +157,72 @@ class SensorReading(Base):
     """
     __tablename__ = 'sensor_readings'
     
-    id = Column(Integer, primary_key=True, autoincrement=True)
-    sensor_id = Column(String, ForeignKey('sensors.sensor_id'), nullable=False)
-    timestamp = Column(DateTime, nullable=False, default=datetime.utcnow)
-    temperature = Column(Float, nullable=False)
-    humidity = Column(Float, nullable=False)
-    battery_voltage = Column(Float, nullable=True)
+    id: Mapped[int] = mapped_column(Integer, primary_key=True, autoincrement=True)
+    sensor_id: Mapped[str] = mapped_column(String, ForeignKey('sensors.sensor_id', ondelete='CASCADE'), nullable=False)
+    timestamp: Mapped[datetime] = mapped_column(DateTime, nullable=False, server_default=func.now())
+    temperature: Mapped[float] = mapped_column(ScaledFloat, nullable=False)  # hundredths of a degree
+    humidity: Mapped[float] = mapped_column(ScaledFloat, nullable=False)  # hundredths of a percent
+    battery_voltage: Mapped[Optional[float]] = mapped_column(Float, nullable=True)
     
-    # Relationship to sensor
-    sensor = relationship("Sensor", back_populates="readings")
+    # Per-sensor time range reads and retention purges seek on these; the
+    # unique index also lets inserts skip already-stored samples
+    __table_args__ = (
+        Index('uq_sensor_readings_sensor_ts', 'sensor_id', 'timestamp', unique=True),
+        Index('ix_sensor_readings_ts', 'timestamp'),
+    )
+    
+    # Write-once rows (as are errors and login attempts): fetch server defaults
+    # in the INSERT itself (RETURNING) and skip the rowcount check on deletes
+    __mapper_args__ = {'eager_defaults': True, 'confirm_deleted_rows': False}
     
-    def __init__(self, sensor_id, timestamp, temperature, humidity, battery_voltage=None):
-        self.sensor_id = sensor_id
-        self.timestamp = timestamp
-        self.temperature = temperature
-        self.humidity = humidity
-        self.battery_voltage = battery_voltage
+    # Relationship to sensor
+    sensor: Mapped["Sensor"] = relationship("Sensor", back_populates="readings")
     
     def __repr__(self):
+        return f"<SensorReading(id={self.id})>"
+    
+    def describe(self) -> str:
+        """Return every significant field, for debugging output."""
         return f"<SensorReading(id={self.id}, sensor_id='{self.sensor_id}', timestamp='{self.timestamp}', temp={self.temperature}, humidity={self.humidity}, battery_voltage={self.battery_voltage})>"
 
 
+def bulk_insert_readings(session, rows, chunk_size=READING_INSERT_CHUNK) -> int:
+    """
+    Insert sensor readings in batches, skipping samples that are already stored.
+    
+    On SQLite and PostgreSQL each batch is one INSERT ... ON CONFLICT DO NOTHING
+    against the (sensor_id, timestamp) unique index, so callers need no
+    duplicate pre-check; RETURNING reports which rows were actually written.
+    Other backends fall back to a plain bulk_insert().
+    
+    Args:
+        session: Database session
+        rows: Iterable of dicts with sensor_id, timestamp, temperature, humidity
+              and optionally battery_voltage
+        chunk_size: Number of rows sent per INSERT statement
+        
+    Returns:
+        int: Number of readings inserted
+    """
+    dialect_name = session.get_bind().dialect.name
+    if dialect_name == 'sqlite':
+        stmt = sqlite_insert(SensorReading)
+    elif dialect_name == 'postgresql':
+        stmt = postgresql_insert(SensorReading)
+    else:
+        return bulk_insert(session, SensorReading, rows, chunk_size)
+    stmt = stmt.on_conflict_do_nothing(index_elements=['sensor_id', 'timestamp']).returning(SensorReading.id)
+    
+    session.flush()
+    rows = iter(rows)
+    inserted = 0
+    while True:
+        page = list(islice(rows, chunk_size))
+        if not page:
+            return inserted
+        inserted += len(session.execute(stmt, page).all())
+
+
 class Error(Base):
     """
     Model for the errors table.
@@ -73,15 +231,27 @@ class Error(Base):
     """
     __tablename__ = 'errors'
     
-    id = Column(Integer, primary_key=True, autoincrement=True)
-    timestamp = Column(DateTime, nullable=False, default=datetime.utcnow)
-    error_id = Column(String, unique=True, nullable=False)
-    message = Column(Text, nullable=False)
-    stack_trace = Column(Text, nullable=True)
-    level = Column(String, nullable=True, default='ERROR')
-    source = Column(String, nullable=True, default='application')
+    id: Mapped[int] = mapped_column(Integer, primary_key=True, autoincrement=True)
+    timestamp: Mapped[datetime] = mapped_column(DateTime, nullable=False, server_default=func.now())
+    error_id: Mapped[str] = mapped_column(String, unique=True, nullable=False)
+    message: Mapped[str] = mapped_column(Text, nullable=False)
+    stack_trace: Mapped[Optional[str]] = mapped_column(CompressedText, nullable=True)  # zlib-compressed on disk
+    level: Mapped[Optional[str]] = mapped_column(String, nullable=True, default='ERROR')
+    source: Mapped[Optional[str]] = mapped_column(String, nullable=True, default='application')
+    count: Mapped[int] = mapped_column(Integer, nullable=False, default=1)  # occurrences folded into this record
+    last_seen: Mapped[Optional[datetime]] = mapped_column(DateTime, nullable=True)  # most recent repeat, if any
+    
+    __table_args__ = (
+        Index('ix_errors_ts', 'timestamp'),
+    )
+    
+    __mapper_args__ = {'eager_defaults': True, 'confirm_deleted_rows': False}
     
     def __repr__(self):
+        return f"<Error(id={self.id})>"
+    
+    def describe(self) -> str:
+        """Return every significant field, for debugging output."""
         return f"<Error(id={self.id}, error_id='{self.error_id}', level='{self.level}', timestamp='{self.timestamp}')>"
 
 
@@ -93,12 +263,16 @@ class ManagerAuth(Base):
     """
     __tablename__ = 'manager_auth'
     
-    id = Column(Integer, primary_key=True, autoincrement=True)
-    pin_hash = Column(String, nullable=False)
-    created_at = Column(DateTime, nullable=False, default=lambda: datetime.now(UTC))
-    updated_at = Column(DateTime, nullable=False, default=lambda: datetime.now(UTC), onupdate=lambda: datetime.now(UTC))
+    id: Mapped[int] = mapped_column(Integer, primary_key=True, autoincrement=True)
+    pin_hash: Mapped[str] = mapped_column(String, nullable=False)
+    created_at: Mapped[datetime] = mapped_column(DateTime, nullable=False, default=lambda: datetime.now(UTC))
+    updated_at: Mapped[datetime] = mapped_column(DateTime, nullable=False, default=lambda: datetime.now(UTC), onupdate=lambda: datetime.now(UTC))
     
     def __repr__(self):
+        return f"<ManagerAuth(id={self.id})>"
+    
+    def describe(self) -> str:
+        """Return every significant field, for debugging output."""
         return f"<ManagerAuth(id={self.id}, created_at='{self.created_at}')>"
 
 
@@ -110,12 +284,23 @@ class LoginAttempt(Base):
     """
     __tablename__ = 'login_attempts'
     
-    id = Column(Integer, primary_key=True, autoincrement=True)
-    ip_address = Column(String, nullable=False)
-    timestamp = Column(DateTime, nullable=False, default=lambda: datetime.now(UTC))
-    success = Column(Boolean, nullable=False, default=False)
+    id: Mapped[int] = mapped_column(Integer, primary_key=True, autoincrement=True)
+    ip_address: Mapped[str] = mapped_column(String, nullable=False)
+    timestamp: Mapped[datetime] = mapped_column(DateTime, nullable=False, default=lambda: datetime.now(UTC))
+    success: Mapped[bool] = mapped_column(Boolean, nullable=False, default=False)
+    
+    # The lockout check counts recent failures per IP address
+    __table_args__ = (
+        Index('ix_login_attempts_ip_ts', 'ip_address', 'timestamp'),
+    )
+    
+    __mapper_args__ = {'eager_defaults': True, 'confirm_deleted_rows': False}
     
     def __repr__(self):
+        return f"<LoginAttempt(id={self.id})>"
+    
+    def describe(self) -> str:
+        """Return every significant field, for debugging output."""
         return f"<LoginAttempt(id={self.id}, ip_address='{self.ip_address}', success={self.success}, timestamp='{self.timestamp}')>"
 
 
@@ -127,14 +312,18 @@ class ManagerSession(Base):
     """
     __tablename__ = 'manager_sessions'
     
-    id = Column(Integer, primary_key=True, autoincrement=True)
-    session_id = Column(String, unique=True, nullable=False)
-    ip_address = Column(String, nullable=False)
-    created_at = Column(DateTime, nullable=False, default=lambda: datetime.now(UTC))
-    expires_at = Column(DateTime, nullable=False)
-    active = Column(Boolean, nullable=False, default=True)
+    id: Mapped[int] = mapped_column(Integer, primary_key=True, autoincrement=True)
+    session_id: Mapped[str] = mapped_column(String, unique=True, nullable=False)
+    ip_address: Mapped[str] = mapped_column(String, nullable=False)
+    created_at: Mapped[datetime] = mapped_column(DateTime, nullable=False, default=lambda: datetime.now(UTC))
+    expires_at: Mapped[datetime] = mapped_column(DateTime, nullable=False)
+    active: Mapped[bool] = mapped_column(Boolean, nullable=False, default=True)
     
     def __repr__(self):
+        return f"<ManagerSession(id={self.id})>"
+    
+    def describe(self) -> str:
+        """Return every significant field, for debugging output."""
         return f"<ManagerSession(id={self.id}, session_id='{self.session_id}', active={self.active})>"
 
 
@@ -146,11 +335,39 @@ class SystemSettings(Base):
     """
     __tablename__ = 'system_settings'
     
-    id = Column(Integer, primary_key=True, autoincrement=True)
-    setting_key = Column(String, unique=True, nullable=False)
-    setting_value = Column(String, nullable=False)
-    description = Column(String, nullable=True)
-    updated_at = Column(DateTime, nullable=False, default=lambda: datetime.now(UTC), onupdate=lambda: datetime.now(UTC))
+    id: Mapped[int] = mapped_column(Integer, primary_key=True, autoincrement=True)
+    setting_key: Mapped[str] = mapped_column(String, unique=True, nullable=False)
+    setting_value: Mapped[str] = mapped_column(String, nullable=False)
+    description: Mapped[Optional[str]] = mapped_column(String, nullable=True)
+    updated_at: Mapped[datetime] = mapped_column(DateTime, nullable=False, default=lambda: datetime.now(UTC), onupdate=lambda: datetime.now(UTC))
     
     def __repr__(self):
-        return f"<SystemSettings(key='{self.setting_key}', value='{self.setting_value}')>"
\ No newline at end of file
+        return f"<SystemSettings(id={self.id})>"
+    
+    def describe(self) -> str:
+        """Return every significant field, for debugging output."""
+        return f"<SystemSettings(id={self.id}, key='{self.setting_key}', value='{self.setting_value}')>"
+
+
+# Prebuilt statements for per-request lookups. SQLAlchemy builds and compiles
+# each once; calls only supply the bound parameters.
+
+# Newest reading for a sensor; params: sensor_id
+LATEST_READING_FOR_SENSOR = lambda_stmt(
+    lambda: select(SensorReading)
+    .where(SensorReading.sensor_id == bindparam('sensor_id'))
+    .order_by(SensorReading.timestamp.desc())
+    .limit(1)
+)
+
+# Id of a live manager session; params: session_id, ip_address, now
+ACTIVE_MANAGER_SESSION = lambda_stmt(
+    lambda: select(ManagerSession.id)
+    .where(
+        ManagerSession.session_id == bindparam('session_id'),
+        ManagerSession.ip_address == bindparam('ip_address'),
+        ManagerSession.active == true(),
+        ManagerSession.expires_at > bindparam('now')
+    )
+    .limit(1)
+)
@@ -7,26 +7,66 @@ It also manages data retention by periodically purging old sensor readings.
 """
 
 import logging
+import os
+import threading
 import time
+from concurrent.futures import ThreadPoolExecutor
 from typing import Optional, Dict, Any
-from datetime import datetime
+from datetime import datetime, UTC
+
+try:
+    import fcntl
+except ImportError:  # pragma: no cover - non-POSIX platforms
+    fcntl = None
 
 from apscheduler.schedulers.background import BackgroundScheduler
+from apscheduler.executors.pool import ThreadPoolExecutor as SchedulerThreadPool
 from apscheduler.triggers.interval import IntervalTrigger
 from apscheduler.triggers.cron import CronTrigger
 from apscheduler.events import EVENT_JOB_EXECUTED, EVENT_JOB_ERROR
+from apscheduler.jobstores.base import JobLookupError
 
-import os
 from config import Config, get_config, TestingConfig
 from sensorpush_api import SensorPushAPI, SensorPushAPIError, AuthenticationError, APIConnectionError
 from database import get_db_session_context
-from models import Sensor, SensorReading
+from models import Sensor, bulk_insert, bulk_insert_readings
+from settings_manager import SettingsManager, invalidate_settings_cache
 from sqlalchemy.exc import SQLAlchemyError
-from sqlalchemy import and_
 from error_handling import handle_polling_error, log_info, log_warning, log_debug, get_error_handler
 from data_retention import purge_old_readings, DataRetentionError
 
 
+# Maximum number of sensor IDs bound into a single IN (...) lookup
+SENSOR_ID_CHUNK_SIZE = 500
+
+# Seconds sensor names fetched from the API are reused; names only matter when
+# a new sensor is created, and a cache lacking a requested sensor is refreshed
+SENSOR_NAMES_CACHE_TTL = 3600.0
+
+_sensor_names_cache: Dict[str, str] = {}
+_sensor_names_loaded_at = 0.0
+_sensor_names_lock = threading.Lock()
+
+# Seconds between checks of the persisted polling interval. Only one gunicorn
+# worker owns the poller, so a change saved through any other worker is picked
+# up here rather than by an in-process call
+SETTINGS_CHECK_INTERVAL = 60
+
+
+def parse_observed(value: str) -> datetime:
+    """
+    Parse a SensorPush 'observed' timestamp into a naive UTC datetime.
+
+    Reading timestamps are stored without a timezone, so parsed values are
+    normalised to match what the database returns. fromisoformat() accepts
+    the trailing 'Z' itself on Python 3.11+.
+    """
+    timestamp = datetime.fromisoformat(value)
+    if timestamp.tzinfo is not None:
+        timestamp = timestamp.astimezone(UTC).replace(tzinfo=None)
+    return timestamp
+
+
 class PollingServiceError(Exception):
     """Base exception for polling service errors."""
     pass
@@ -55,14 +95,23 @@ class PollingService:
         # Ensure that the provided config_class is always used, not the default Config
         self.api_client = api_client or SensorPushAPI(config_class)
         
-        # Initialize scheduler
-        self.scheduler = BackgroundScheduler()
+        # Initialize scheduler; polling and purging get their own worker
+        # threads so a long retention purge never delays a polling tick
+        self.scheduler = BackgroundScheduler(executors={
+            'poll': SchedulerThreadPool(1),
+            'purge': SchedulerThreadPool(1),
+        })
         self.scheduler.add_listener(self._job_listener, EVENT_JOB_EXECUTED | EVENT_JOB_ERROR)
         
         # Service state
         self._is_running = False
         self._job_id = 'sensorpush_polling_job'
         self._purge_job_id = 'data_retention_purge_job'
+        self._settings_job_id = 'polling_settings_check_job'
+        # Set whenever a polling job run finishes, successful or not
+        self._poll_complete = threading.Event()
+        # Job handles returned by add_job(), so triggers skip the jobstore lookup
+        self._jobs: Dict[str, Any] = {}
         
         # Statistics
         self._last_poll_time: Optional[datetime] = None
@@ -72,8 +121,7 @@ class PollingService:
         self._successful_purges = 0
         self._failed_purges = 0
         
-        # Import SettingsManager and get polling interval from database
-        from settings_manager import SettingsManager
+        # Get polling interval from database
         self.polling_interval = SettingsManager.get_polling_interval()
         
         log_info(f"Polling service initialized with interval: {self.polling_interval} minutes", "PollingService.__init__")
@@ -96,7 +144,7 @@ class PollingService:
             elif job_name == self._purge_job_id:
                 self._failed_purges += 1
         else:
-            log_debug(f"Job {job_name} completed successfully", "PollingService._job_listener")
+            log_debug("Job %s completed successfully", "PollingService._job_listener", job_name)
             
             if job_name == self._job_id:
                 self._successful_polls += 1
@@ -114,15 +162,21 @@ class PollingService:
             log_info("Starting polling job execution", "PollingService._polling_job")
             self._last_poll_time = datetime.now()
             
-            # Fetch sensor samples
+            # Fetch sensor samples and device battery data concurrently; the
+            # two requests are independent, so a poll waits for the slower one
+            # rather than both in turn
             try:
                 log_debug("Fetching sensor samples", "PollingService._polling_job")
-                samples_data = self.api_client.get_samples()
+                with ThreadPoolExecutor(max_workers=2, thread_name_prefix='sensorpush-fetch') as executor:
+                    devices_future = executor.submit(self._fetch_devices_data)
+                    samples_future = executor.submit(self.api_client.get_samples)
+                    devices_data = devices_future.result()
+                    samples_data = samples_future.result()
                 log_info(f"Successfully retrieved samples data with {len(samples_data.get('sensors', {}))} sensors", "PollingService._polling_job")
                 
                 # Process and store samples data in database
                 try:
-                    self._process_samples_data(samples_data)
+                    self._process_samples_data(samples_data, devices_data)
                 except (SQLAlchemyError, Exception) as e:
                     error_id = handle_polling_error(e, "Processing samples data")
                     log_warning(f"Failed to process samples data with error ID: {error_id}", "PollingService._polling_job")
@@ -151,6 +205,9 @@ class PollingService:
             log_warning(f"Unexpected error during polling with error ID: {error_id}", "PollingService._polling_job")
             # Re-raise unexpected errors to trigger the job listener
             raise
+        
+        finally:
+            self._poll_complete.set()
     
     def _data_purge_job(self):
         """
@@ -191,13 +248,39 @@ class PollingService:
             log_warning(f"Unexpected error during data purge job with error ID: {error_id}", "PollingService._data_purge_job")
             raise
     
-    def _get_sensor_names(self) -> Dict[str, str]:
+    def _settings_check_job(self):
+        """
+        Apply a polling interval changed in the database since the last check.
+        
+        The settings page may be served by a worker that does not run the
+        poller, so the owning worker re-reads the persisted setting instead.
+        """
+        interval = SettingsManager.get_polling_interval()
+        if interval != self.polling_interval:
+            log_info("Persisted polling interval changed from %d to %d minutes",
+                     "PollingService._settings_check_job", self.polling_interval, interval)
+            self.update_polling_interval(interval)
+    
+    def _get_sensor_names(self, sensor_ids=None) -> Dict[str, str]:
         """
         Fetch sensor names from the SensorPush API.
         
+        Names are cached for SENSOR_NAMES_CACHE_TTL seconds; the API is called
+        again early when the cache has no entry for one of sensor_ids.
+        
+        Args:
+            sensor_ids: Sensor IDs the caller needs names for (optional)
+        
         Returns:
             dict: Mapping of sensor_id to sensor name
         """
+        global _sensor_names_cache, _sensor_names_loaded_at
+        
+        with _sensor_names_lock:
+            if (_sensor_names_cache and time.monotonic() - _sensor_names_loaded_at < SENSOR_NAMES_CACHE_TTL
+                    and all(sensor_id in _sensor_names_cache for sensor_id in sensor_ids or ())):
+                return _sensor_names_cache
+        
         try:
             sensors_metadata = self.api_client.get_sensors()
             sensor_names = {}
@@ -207,58 +290,87 @@ class PollingService:
                 sensor_name = sensor_info.get('name', f'Sensor {sensor_id}')
                 sensor_names[sensor_id] = sensor_name
                 
-            log_debug(f"Retrieved names for {len(sensor_names)} sensors", "PollingService._get_sensor_names")
+            log_debug("Retrieved names for %d sensors", "PollingService._get_sensor_names", len(sensor_names))
+            with _sensor_names_lock:
+                _sensor_names_cache = sensor_names
+                _sensor_names_loaded_at = time.monotonic()
             return sensor_names
             
         except Exception as e:
             log_warning(f"Failed to fetch sensor names: {e}. Will use generic names.", "PollingService._get_sensor_names")
             return {}
     
-    def _process_samples_data(self, samples_data: Dict[str, Any]):
+    def _fetch_devices_data(self) -> Dict[str, Any]:
+        """
+        Fetch sensor device data (battery voltage) from the /devices/sensors endpoint.
+        
+        Returns:
+            dict: Device data by sensor_id, empty if the request failed
+        """
+        try:
+            log_debug("Fetching battery voltage data from /devices/sensors endpoint", "PollingService._fetch_devices_data")
+            devices_data = self.api_client.get_devices_sensors()
+            return devices_data if isinstance(devices_data, dict) else {}
+        except Exception as e:
+            log_warning(f"Failed to fetch battery voltage data: {e}. Proceeding without battery voltage.", "PollingService._fetch_devices_data")
+            return {}
+    
+    def _process_samples_data(self, samples_data: Dict[str, Any], devices_data: Optional[Dict[str, Any]] = None):
         """
         Process and store sensor samples data in the database.
         
         Args:
             samples_data: Raw samples data from the SensorPush API
+            devices_data: Device data already fetched for this poll (optional,
+                          fetched here if not provided)
         """
         try:
             with get_db_session_context() as session:
                 sensors_data = samples_data.get('sensors', {})
-                new_readings_count = 0
-                duplicate_readings_count = 0
+                new_readings = []
+                new_sensor_rows = []
+                # Parsed observed timestamps by string; the same instants repeat
+                # across sensors
+                observed_times = {}
                 
                 # Get sensor names from API for any new sensors we might need to create
                 sensor_names = {}
-                new_sensor_ids = []
                 
-                # First pass: identify sensors that don't exist in database
-                for sensor_id in sensors_data.keys():
-                    existing_sensor = session.query(Sensor).filter(Sensor.sensor_id == sensor_id).first()
-                    if not existing_sensor:
-                        new_sensor_ids.append(sensor_id)
+                # First pass: identify sensors that don't exist in database with
+                # one lookup per chunk of IDs instead of one query per sensor
+                incoming_ids = list(sensors_data.keys())
+                existing_ids = set()
+                for start in range(0, len(incoming_ids), SENSOR_ID_CHUNK_SIZE):
+                    chunk = incoming_ids[start:start + SENSOR_ID_CHUNK_SIZE]
+                    existing_ids.update(
+                        row[0] for row in session.query(Sensor.sensor_id).filter(Sensor.sensor_id.in_(chunk)).all()
+                    )
+                new_sensor_ids = [sensor_id for sensor_id in incoming_ids if sensor_id not in existing_ids]
                 
-                # Fetch sensor names if we have new sensors to create
+                # Fetch sensor names only if we have new sensors to create; in
+                # steady state every incoming sensor exists and no names call is
+                # made, and a cold start pays for it once per names-cache TTL
                 if new_sensor_ids:
-                    sensor_names = self._get_sensor_names()
-                    log_debug(f"Fetched sensor names for {len(new_sensor_ids)} new sensors", "PollingService._process_samples_data")
+                    sensor_names = self._get_sensor_names(new_sensor_ids)
+                    log_debug("Fetched sensor names for %d new sensors", "PollingService._process_samples_data", len(new_sensor_ids))
+                
+                # Battery voltage comes from the /devices/sensors endpoint
+                if devices_data is None:
+                    devices_data = self._fetch_devices_data()
                 
-                # Fetch battery voltage data from /devices/sensors endpoint
+                # Extract battery voltage for each sensor
                 battery_voltages = {}
-                try:
-                    log_debug("Fetching battery voltage data from /devices/sensors endpoint", "PollingService._process_samples_data")
-                    devices_data = self.api_client.get_devices_sensors()
-                    
-                    # Extract battery voltage for each sensor
-                    for sensor_id, sensor_info in devices_data.items():
-                        if isinstance(sensor_info, dict) and 'battery_voltage' in sensor_info:
-                            battery_voltages[sensor_id] = sensor_info['battery_voltage']
-                            log_debug(f"Found battery voltage for sensor {sensor_id}: {sensor_info['battery_voltage']}V", "PollingService._process_samples_data")
-                    
+                for sensor_id, sensor_info in devices_data.items():
+                    if isinstance(sensor_info, dict) and sensor_info.get('battery_voltage') is not None:
+                        try:
+                            battery_voltages[sensor_id] = float(sensor_info['battery_voltage'])
+                        except (ValueError, TypeError):
+                            log_warning(f"Invalid battery voltage for sensor {sensor_id}: {sensor_info['battery_voltage']}", "PollingService._process_samples_data")
+                            continue
+                        log_debug("Found battery voltage for sensor %s: %sV", "PollingService._process_samples_data", sensor_id, battery_voltages[sensor_id])
+                
+                if devices_data:
                     log_info(f"Retrieved battery voltage data for {len(battery_voltages)} sensors", "PollingService._process_samples_data")
-                    
-                except Exception as e:
-                    log_warning(f"Failed to fetch battery voltage data: {e}. Proceeding without battery voltage.", "PollingService._process_samples_data")
-                    # Continue processing without battery voltage data
                 
                 for sensor_id, readings in sensors_data.items():
                     if not isinstance(readings, list):
@@ -266,22 +378,24 @@ class PollingService:
                         continue
                     
                     # Ensure sensor exists in database (create if not exists)
-                    existing_sensor = session.query(Sensor).filter(Sensor.sensor_id == sensor_id).first()
-                    if not existing_sensor:
+                    if sensor_id not in existing_ids:
                         # Use actual sensor name from API if available, otherwise fallback to generic name
                         sensor_name = sensor_names.get(sensor_id, f'Sensor {sensor_id}')
                         
-                        new_sensor = Sensor(
-                            sensor_id=sensor_id,
-                            name=sensor_name,
-                            active=True,
-                            min_temp=0.0,  # Default minimum temperature
-                            max_temp=50.0,  # Default maximum temperature
-                            min_humidity=0.0,  # Default minimum humidity
-                            max_humidity=100.0  # Default maximum humidity
-                        )
-                        session.add(new_sensor)
-                        log_debug(f"Created new sensor {sensor_id} with name '{sensor_name}' from samples data", "PollingService._process_samples_data")
+                        new_sensor_rows.append({
+                            'sensor_id': sensor_id,
+                            'name': sensor_name,
+                            'active': True,
+                            'min_temp': 0.0,  # Default minimum temperature
+                            'max_temp': 50.0,  # Default maximum temperature
+                            'min_humidity': 0.0,  # Default minimum humidity
+                            'max_humidity': 100.0  # Default maximum humidity
+                        })
+                        existing_ids.add(sensor_id)
+                        log_debug("Queued new sensor %s with name '%s' from samples data", "PollingService._process_samples_data", sensor_id, sensor_name)
+                    
+                    # Battery voltage is per sensor, so look it up once rather than per reading
+                    battery_voltage = battery_voltages.get(sensor_id)
                     
                     for reading in readings:
                         try:
@@ -291,46 +405,37 @@ class PollingService:
                             humidity = reading.get('humidity')
                             # Note: battery_voltage is not available in samples data, get from devices/sensors
                             
-                            if not all([timestamp_str, temperature is not None, humidity is not None]):
+                            if not timestamp_str or temperature is None or humidity is None:
                                 log_warning(f"Incomplete reading data for sensor {sensor_id}: {reading}", "PollingService._process_samples_data")
                                 continue
                             
                             # Parse timestamp
-                            timestamp = datetime.fromisoformat(timestamp_str.replace('Z', '+00:00'))
-                            
-                            # Check for duplicate reading (same sensor_id and timestamp)
-                            existing_reading = session.query(SensorReading).filter(
-                                and_(
-                                    SensorReading.sensor_id == sensor_id,
-                                    SensorReading.timestamp == timestamp
-                                )
-                            ).first()
-                            
-                            if existing_reading:
-                                duplicate_readings_count += 1
-                                continue
-                            
-                            # Get battery voltage from devices/sensors data
-                            battery_voltage = battery_voltages.get(sensor_id)
+                            timestamp = observed_times.get(timestamp_str)
+                            if timestamp is None:
+                                timestamp = observed_times[timestamp_str] = parse_observed(timestamp_str)
                             
-                            # Create new sensor reading with battery voltage from devices/sensors endpoint
-                            new_reading = SensorReading(
-                                sensor_id=sensor_id,
-                                timestamp=timestamp,
-                                temperature=float(temperature),
-                                humidity=float(humidity),
-                                battery_voltage=float(battery_voltage) if battery_voltage is not None else None
-                            )
-                            
-                            session.add(new_reading)
-                            new_readings_count += 1
+                            # Queue new sensor reading with battery voltage from devices/sensors endpoint
+                            new_readings.append({
+                                'sensor_id': sensor_id,
+                                'timestamp': timestamp,
+                                'temperature': float(temperature),
+                                'humidity': float(humidity),
+                                'battery_voltage': battery_voltage
+                            })
                             
                         except (ValueError, TypeError) as e:
                             error_id = handle_polling_error(e, f"Processing reading for sensor {sensor_id}")
                             log_warning(f"Error processing reading for sensor {sensor_id} with error ID: {error_id}", "PollingService._process_samples_data")
                             continue
                 
-                # Commit all new readings
+                # Insert new sensors ahead of the readings that reference them
+                if new_sensor_rows:
+                    bulk_insert(session, Sensor, new_sensor_rows)
+                
+                # Insert and commit all new readings; samples already stored
+                # (same sensor_id and timestamp) are skipped by the database
+                new_readings_count = bulk_insert_readings(session, new_readings)
+                duplicate_readings_count = len(new_readings) - new_readings_count
                 session.commit()
                 log_info(f"Processed samples: {new_readings_count} new readings, {duplicate_readings_count} duplicates skipped", "PollingService._process_samples_data")
                 
@@ -378,25 +483,37 @@ class PollingService:
                 raise PollingServiceError(f"API connection test failed with error ID {error_id}: {e}")
             
             # Add polling job to scheduler
-            self.scheduler.add_job(
+            self._jobs[self._job_id] = self.scheduler.add_job(
                 func=self._polling_job,
                 trigger=IntervalTrigger(minutes=self.polling_interval),
                 id=self._job_id,
                 name='SensorPush API Polling Job',
+                executor='poll',
                 replace_existing=True,
                 max_instances=1  # Prevent overlapping job executions
             )
             
             # Add data purging job to scheduler (runs daily at 2 AM)
-            self.scheduler.add_job(
+            self._jobs[self._purge_job_id] = self.scheduler.add_job(
                 func=self._data_purge_job,
                 trigger=CronTrigger(hour=2, minute=0),  # Daily at 2:00 AM
                 id=self._purge_job_id,
                 name='Data Retention Purge Job',
+                executor='purge',
                 replace_existing=True,
                 max_instances=1  # Prevent overlapping job executions
             )
             
+            # Pick up polling interval changes saved by other workers
+            self._jobs[self._settings_job_id] = self.scheduler.add_job(
+                func=self._settings_check_job,
+                trigger=IntervalTrigger(seconds=SETTINGS_CHECK_INTERVAL),
+                id=self._settings_job_id,
+                name='Polling Settings Check Job',
+                replace_existing=True,
+                max_instances=1
+            )
+            
             # Start the scheduler
             self.scheduler.start()
             self._is_running = True
@@ -437,6 +554,7 @@ class PollingService:
             
             # Shutdown the scheduler
             self.scheduler.shutdown(wait=True)
+            self._jobs.clear()
             self._is_running = False
             
             log_info("Polling service stopped successfully", "PollingService.stop")
@@ -463,8 +581,9 @@ class PollingService:
         Returns:
             dict: Service status information
         """
+        scheduler_running = self.scheduler is not None and self.scheduler.running
         return {
-            'is_running': self.is_running(),
+            'is_running': self._is_running and scheduler_running,
             'polling_interval_minutes': self.polling_interval,
             'last_poll_time': self._last_poll_time.isoformat() if self._last_poll_time else None,
             'last_purge_time': self._last_purge_time.isoformat() if self._last_purge_time else None,
@@ -475,10 +594,40 @@ class PollingService:
             'failed_purges': self._failed_purges,
             'total_purges': self._successful_purges + self._failed_purges,
             'data_retention_months': self.config.DATA_RETENTION_MONTHS,
-            'scheduler_running': self.scheduler.running if hasattr(self, 'scheduler') else False,
+            'scheduler_running': scheduler_running,
             'api_token_valid': self.api_client.is_token_valid() if self.api_client else False
         }
     
+    def _apply_to_job(self, job_id: str, action) -> bool:
+        """
+        Apply action to a scheduled job.
+        
+        The Job kept from start() is used directly; the scheduler is only
+        searched when no handle is cached or the cached job has gone away.
+        
+        Args:
+            job_id: ID of the scheduled job
+            action: Callable taking the Job
+            
+        Returns:
+            bool: True if the job was found and action applied, False otherwise
+        """
+        job = self._jobs.get(job_id)
+        if job is not None:
+            try:
+                action(job)
+                return True
+            except JobLookupError:
+                pass
+        
+        job = self.scheduler.get_job(job_id)
+        if not job:
+            self._jobs.pop(job_id, None)
+            return False
+        self._jobs[job_id] = job
+        action(job)
+        return True
+    
     def trigger_immediate_poll(self) -> bool:
         """
         Trigger an immediate polling job execution.
@@ -492,9 +641,7 @@ class PollingService:
         
         try:
             log_info("Triggering immediate polling job", "PollingService.trigger_immediate_poll")
-            job = self.scheduler.get_job(self._job_id)
-            if job:
-                job.modify(next_run_time=datetime.now())
+            if self._apply_to_job(self._job_id, lambda job: job.modify(next_run_time=datetime.now())):
                 log_info("Immediate poll triggered successfully", "PollingService.trigger_immediate_poll")
                 return True
             else:
@@ -519,9 +666,7 @@ class PollingService:
         
         try:
             log_info("Triggering immediate data purge job", "PollingService.trigger_immediate_purge")
-            job = self.scheduler.get_job(self._purge_job_id)
-            if job:
-                job.modify(next_run_time=datetime.now())
+            if self._apply_to_job(self._purge_job_id, lambda job: job.modify(next_run_time=datetime.now())):
                 log_info("Immediate purge triggered successfully", "PollingService.trigger_immediate_purge")
                 return True
             else:
@@ -548,17 +693,16 @@ class PollingService:
             return False
         
         try:
-            log_info(f"Updating polling interval to {interval_minutes} minutes", "PollingService.update_polling_interval")
+            log_info("Updating polling interval to %d minutes", "PollingService.update_polling_interval", interval_minutes)
             
             # Update the instance variable
             self.polling_interval = interval_minutes
             
             if self._is_running:
                 # Update the existing job
-                job = self.scheduler.get_job(self._job_id)
-                if job:
-                    job.reschedule(trigger=IntervalTrigger(minutes=interval_minutes))
-                    log_info(f"Polling interval updated to {interval_minutes} minutes", "PollingService.update_polling_interval")
+                trigger = IntervalTrigger(minutes=interval_minutes)
+                if self._apply_to_job(self._job_id, lambda job: job.reschedule(trigger=trigger)):
+                    log_info("Polling interval updated to %d minutes", "PollingService.update_polling_interval", interval_minutes)
                     return True
                 else:
                     log_warning("Polling job not found in scheduler", "PollingService.update_polling_interval")
@@ -572,6 +716,14 @@ class PollingService:
             log_warning(f"Failed to update polling interval with error ID: {error_id}", "PollingService.update_polling_interval")
             return False
     
+    def invalidate_caches(self):
+        """Drop cached sensor names and settings after an explicit settings change."""
+        global _sensor_names_cache
+        with _sensor_names_lock:
+            _sensor_names_cache = {}
+        invalidate_settings_cache()
+        log_debug("Polling caches invalidated", "PollingService.invalidate_caches")
+    
     def close(self):
         """Clean up resources and close the polling service."""
         log_info("Closing polling service", "PollingService.close")
@@ -602,14 +754,49 @@ def create_polling_service(config_class=None, api_client=None) -> PollingService
     return PollingService(config_class, api_client)
 
 
+# File descriptor of the held polling lock; kept open for the process lifetime
+_polling_lock_fd = None
+
+
+def acquire_polling_lock(lock_path: Optional[str]) -> bool:
+    """
+    Try to become the single process that runs the polling service.
+    
+    Gunicorn forks one app per worker, and each would otherwise start its own
+    poller. An exclusive, non-blocking flock on a shared lock file lets only
+    the first worker poll. The lock is released by the kernel when the owning
+    process exits, so a replacement worker can take over.
+    
+    Args:
+        lock_path: Path of the lock file, or None to disable locking
+        
+    Returns:
+        bool: True if this process may run the polling service
+    """
+    global _polling_lock_fd
+    
+    if not lock_path or fcntl is None or _polling_lock_fd is not None:
+        return True
+    
+    fd = os.open(lock_path, os.O_RDWR | os.O_CREAT, 0o644)
+    try:
+        fcntl.flock(fd, fcntl.LOCK_EX | fcntl.LOCK_NB)
+    except BlockingIOError:
+        os.close(fd)
+        log_info(f"Polling already owned by another worker (pid {os.getpid()} skipping)",
+                 "acquire_polling_lock")
+        return False
+    
+    _polling_lock_fd = fd
+    return True
+
+
 # Example usage and testing function
 def test_polling_service():
     """
     Test function to verify polling service works.
     This can be used for debugging and validation.
     """
-    import time
-    
     # Configure logging for testing
     logging.basicConfig(
         level=logging.INFO,
@@ -628,17 +815,19 @@ def test_polling_service():
         if service.start():
             logger.info("Polling service started successfully")
             
-            # Let it run for a short time
-            logger.info("Letting service run for 30 seconds...")
-            time.sleep(30)
+            # Let it run until the first poll finishes (at most 30 seconds)
+            logger.info("Waiting up to 30 seconds for a poll to complete...")
+            if not service._poll_complete.wait(timeout=30):
+                logger.warning("No poll completed within 30 seconds")
             
             # Check status
             status = service.get_status()
             logger.info(f"Service status: {status}")
             
-            # Trigger immediate poll
-            service.trigger_immediate_poll()
-            time.sleep(5)
+            # Trigger immediate poll and wait for it to finish
+            service._poll_complete.clear()
+            if service.trigger_immediate_poll():
+                service._poll_complete.wait(timeout=30)
             
             # Stop the service
             if service.stop():
@@ -25,17 +25,24 @@ Examples:
 import sys
 import argparse
 import getpass
+from concurrent.futures import ThreadPoolExecutor
 from datetime import datetime, UTC
 from typing import Optional
 
+from sqlalchemy import text
+
 # Import project modules
 from database import get_db_session_context, init_database
-from models import ManagerAuth, LoginAttempt, ManagerSession
+from models import ManagerAuth
 from auth import AuthManager
 from error_handling import log_info, log_warning, log_error
 from config import get_config
 
 
+# Common PINs rejected outright by validate_pin
+_WEAK_PINS = frozenset({"000000", "123456", "111111"})
+
+
 class PinResetTool:
     """Manager PIN reset utility with comprehensive validation and logging."""
     
@@ -66,11 +73,11 @@ class PinResetTool:
             return False, "PIN must be no more than 20 digits long"
             
         # Check for weak patterns
-        if pin == "000000" or pin == "123456" or pin == "111111":
+        if pin in _WEAK_PINS:
             return False, "PIN is too weak. Avoid common patterns like 000000, 123456, or repeated digits"
             
         # Check for sequential patterns
-        if len(set(pin)) == 1:  # All same digits
+        if pin == pin[0] * len(pin):  # All same digits
             return False, "PIN cannot be all the same digit"
             
         return True, ""
@@ -106,7 +113,7 @@ class PinResetTool:
         """
         try:
             with get_db_session_context() as db_session:
-                deleted_count = db_session.query(LoginAttempt).delete()
+                deleted_count = db_session.execute(text("DELETE FROM login_attempts")).rowcount
                 db_session.commit()
                 log_info(f"Cleared {deleted_count} failed login attempts", "PinResetTool.clear_failed_attempts")
                 return True
@@ -123,7 +130,7 @@ class PinResetTool:
         """
         try:
             with get_db_session_context() as db_session:
-                deleted_count = db_session.query(ManagerSession).delete()
+                deleted_count = db_session.execute(text("DELETE FROM manager_sessions")).rowcount
                 db_session.commit()
                 log_info(f"Cleared {deleted_count} manager sessions", "PinResetTool.clear_manager_sessions")
                 return True
@@ -131,7 +138,8 @@ class PinResetTool:
             log_error(f"Error clearing manager sessions: {str(e)}", "PinResetTool.clear_manager_sessions")
             return False
     
-    def reset_pin(self, new_pin: str, clear_sessions: bool = False, clear_attempts: bool = False) -> bool:
+    def reset_pin(self, new_pin: str, clear_sessions: bool = False, clear_attempts: bool = False,
+                  hashed_pin: Optional[str] = None) -> bool:
         """
         Reset the manager PIN.
         
@@ -139,6 +147,7 @@ class PinResetTool:
             new_pin (str): New PIN to set
             clear_sessions (bool): Whether to clear existing sessions
             clear_attempts (bool): Whether to clear failed login attempts
+            hashed_pin (str): Hash of new_pin computed beforehand (optional)
             
         Returns:
             bool: True if successful
@@ -150,15 +159,19 @@ class PinResetTool:
             return False
         
         try:
+            # Hash before opening the transaction so the slow bcrypt round is
+            # not spent holding the database write lock
+            if hashed_pin is None:
+                hashed_pin = self.auth_manager.hash_pin(new_pin)
+            
             with get_db_session_context() as db_session:
                 # Get current PIN info for logging
                 current_info = self.get_current_pin_info()
                 
                 # Delete existing PIN
-                deleted_count = db_session.query(ManagerAuth).delete()
+                deleted_count = db_session.query(ManagerAuth).delete(synchronize_session=False)
                 
                 # Create new PIN
-                hashed_pin = self.auth_manager.hash_pin(new_pin)
                 new_auth = ManagerAuth(pin_hash=hashed_pin)
                 db_session.add(new_auth)
                 db_session.commit()
@@ -222,45 +235,49 @@ class PinResetTool:
         print("   • Avoid weak patterns (000000, 123456, etc.)")
         print("   • Cannot be all the same digit")
         
-        # Get new PIN
-        while True:
+        # A valid PIN is hashed in the background while the user types the
+        # confirmation and answers the final prompt, hiding the bcrypt cost
+        with ThreadPoolExecutor(max_workers=1) as executor:
+            # Get new PIN
+            while True:
+                try:
+                    new_pin = getpass.getpass("\n🔑 Enter new PIN (input hidden): ")
+                    is_valid, error_msg = self.validate_pin(new_pin)
+                    hash_future = executor.submit(self.auth_manager.hash_pin, new_pin) if is_valid else None
+                    confirm_pin = getpass.getpass("🔑 Confirm new PIN: ")
+                    
+                    if new_pin != confirm_pin:
+                        print("❌ PINs do not match. Please try again.")
+                        continue
+                    
+                    if not is_valid:
+                        print(f"❌ {error_msg}")
+                        continue
+                    
+                    break
+                    
+                except KeyboardInterrupt:
+                    print("\n\n❌ Operation cancelled by user")
+                    return False
+            
+            # Confirm reset
+            print(f"\n⚠️  This will reset the manager PIN.")
+            if clear_sessions:
+                print("   • All manager sessions will be cleared")
+            if clear_attempts:
+                print("   • All failed login attempts will be cleared")
+            
             try:
-                new_pin = getpass.getpass("\n🔑 Enter new PIN (input hidden): ")
-                confirm_pin = getpass.getpass("🔑 Confirm new PIN: ")
-                
-                if new_pin != confirm_pin:
-                    print("❌ PINs do not match. Please try again.")
-                    continue
-                
-                is_valid, error_msg = self.validate_pin(new_pin)
-                if not is_valid:
-                    print(f"❌ {error_msg}")
-                    continue
-                
-                break
-                
+                confirm = input("\n❓ Are you sure you want to proceed? (yes/no): ").lower().strip()
+                if confirm not in ['yes', 'y']:
+                    print("❌ Operation cancelled")
+                    return False
             except KeyboardInterrupt:
                 print("\n\n❌ Operation cancelled by user")
                 return False
-        
-        # Confirm reset
-        print(f"\n⚠️  This will reset the manager PIN.")
-        if clear_sessions:
-            print("   • All manager sessions will be cleared")
-        if clear_attempts:
-            print("   • All failed login attempts will be cleared")
-        
-        try:
-            confirm = input("\n❓ Are you sure you want to proceed? (yes/no): ").lower().strip()
-            if confirm not in ['yes', 'y']:
-                print("❌ Operation cancelled")
-                return False
-        except KeyboardInterrupt:
-            print("\n\n❌ Operation cancelled by user")
-            return False
-        
-        # Perform reset
-        return self.reset_pin(new_pin, clear_sessions, clear_attempts)
+            
+            # Perform reset
+            return self.reset_pin(new_pin, clear_sessions, clear_attempts, hashed_pin=hash_future.result())
 
 
 def main():
@@ -53,7 +53,8 @@ def main():
     """
     logger.info("Setting up scheduled data retention service...")
     
-    # Create scheduler
+    # Create scheduler; it sleeps until the next fire time, so a single
+    # daily job costs no wake-ups in between
     scheduler = BlockingScheduler()
     
     # Schedule daily purge at 2:00 AM
@@ -62,7 +63,9 @@ def main():
         trigger=CronTrigger(hour=2, minute=0),  # Daily at 2:00 AM
         id='daily_data_purge',
         name='Daily Data Purge',
-        replace_existing=True
+        replace_existing=True,
+        misfire_grace_time=3600,  # Still run if the wake-up was delayed (e.g. host suspended)
+        coalesce=True  # Several missed runs collapse into a single purge
     )
     
     # Alternative scheduling options (commented out):
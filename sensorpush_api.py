@@ -7,15 +7,23 @@ including OAuth token retrieval, secure storage, expiration checking, and automa
 
 import json
 import logging
+import threading
 import time
 from datetime import datetime, timedelta
 from typing import Optional, Dict, Any
 import requests
+from requests.adapters import HTTPAdapter
 from requests.exceptions import RequestException, HTTPError, ConnectionError, Timeout
+from urllib3.util.retry import Retry
 
 from config import Config
 
 
+# Pooled keep-alive connections kept per host; one poll makes at most a few
+# concurrent calls to the API
+API_POOL_SIZE = 4
+
+
 class SensorPushAPIError(Exception):
     """Base exception for SensorPush API errors."""
     pass
@@ -66,9 +74,20 @@ class SensorPushAPI:
         self._access_token: Optional[str] = None
         self._token_expires_at: Optional[datetime] = None
         self._token_type: str = "Bearer"
+        # Serialises token refresh when several requests run concurrently
+        self._token_lock = threading.Lock()
         
-        # Request session for connection pooling and performance
+        # Request session for connection pooling and performance. Connections
+        # stay open between polls so each cycle reuses the TLS session; failed
+        # connection attempts are retried with a short backoff.
         self.session = requests.Session()
+        adapter = HTTPAdapter(
+            pool_connections=API_POOL_SIZE,
+            pool_maxsize=API_POOL_SIZE,
+            max_retries=Retry(total=getattr(self.config, 'SENSORPUSH_API_RETRIES', 3), backoff_factor=0.3, status=0)
+        )
+        self.session.mount('https://', adapter)
+        self.session.mount('http://', adapter)
         self.session.headers.update({
             'Content-Type': 'application/json',
             'Accept': 'application/json',
@@ -240,8 +259,12 @@ class SensorPushAPI:
         if self.is_token_valid():
             return True
         
-        self.logger.info("Token invalid or expired, attempting to refresh")
-        return self.authenticate()
+        with self._token_lock:
+            # Another thread may have refreshed the token while we waited
+            if self.is_token_valid():
+                return True
+            self.logger.info("Token invalid or expired, attempting to refresh")
+            return self.authenticate()
     
     def get_auth_headers(self) -> Dict[str, str]:
         """
@@ -5,6 +5,8 @@ This module provides functions to manage system settings that can be configured
 through the manager interface, including polling intervals and other system parameters.
 """
 
+import threading
+import time
 from typing import Optional, Dict, Any
 from database import get_db_session_context
 from models import SystemSettings
@@ -12,6 +14,45 @@ from error_handling import log_info, log_warning, log_debug
 from sqlalchemy.exc import SQLAlchemyError
 
 
+# Seconds a loaded copy of the settings table is served before it is re-read
+SETTINGS_CACHE_TTL = 5.0
+
+_settings_cache: Optional[Dict[str, str]] = None
+_settings_loaded_at = 0.0
+_settings_lock = threading.Lock()
+
+
+def _load_settings() -> Dict[str, str]:
+    """
+    Return all setting values by key, re-reading the table at most once per
+    SETTINGS_CACHE_TTL seconds.
+    
+    Raises:
+        SQLAlchemyError: If the settings cannot be read
+    """
+    global _settings_cache, _settings_loaded_at
+    
+    with _settings_lock:
+        if _settings_cache is not None and time.monotonic() - _settings_loaded_at < SETTINGS_CACHE_TTL:
+            return _settings_cache
+    
+    with get_db_session_context() as db_session:
+        rows = db_session.query(SystemSettings.setting_key, SystemSettings.setting_value).all()
+    settings = {key: value for key, value in rows}
+    
+    with _settings_lock:
+        _settings_cache = settings
+        _settings_loaded_at = time.monotonic()
+    return settings
+
+
+def invalidate_settings_cache():
+    """Drop the cached settings so the next read goes to the database."""
+    global _settings_cache
+    with _settings_lock:
+        _settings_cache = None
+
+
 class SettingsManager:
     """
     Manager for system settings stored in the database.
@@ -22,6 +63,9 @@ class SettingsManager:
         """
         Get a system setting value by key.
         
+        Values come from a short-lived in-process copy of the settings table
+        (see SETTINGS_CACHE_TTL); set_setting() refreshes it immediately.
+        
         Args:
             key: Setting key to retrieve
             default_value: Default value if setting doesn't exist
@@ -30,15 +74,8 @@ class SettingsManager:
             Setting value or default_value if not found
         """
         try:
-            with get_db_session_context() as db_session:
-                setting = db_session.query(SystemSettings).filter(
-                    SystemSettings.setting_key == key
-                ).first()
-                
-                if setting:
-                    return setting.setting_value
-                return default_value
-                
+            return _load_settings().get(key, default_value)
+        
         except SQLAlchemyError as e:
             log_warning(f"Error retrieving setting '{key}': {str(e)}", "SettingsManager.get_setting")
             return default_value
@@ -79,6 +116,7 @@ class SettingsManager:
                     log_debug(f"Created new setting '{key}' with value '{value}'", "SettingsManager.set_setting")
                 
                 db_session.commit()
+                invalidate_settings_cache()
                 log_info(f"Setting '{key}' updated successfully", "SettingsManager.set_setting")
                 return True
                 
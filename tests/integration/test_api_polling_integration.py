@@ -65,11 +65,12 @@ class TestAPIPollingIntegration:
                 mock_context.return_value.__enter__.return_value = mock_session_db
                 mock_context.return_value.__exit__.return_value = None
                 mock_session_db.query.return_value.filter.return_value.first.return_value = None
+                mock_session_db.query.return_value.filter.return_value.all.return_value = []
                 
                 polling_service._process_samples_data(samples_data)
                 
                 # Verify database operations
-                assert mock_session_db.add.call_count > 0
+                assert mock_session_db.execute.call_count > 0
                 mock_session_db.commit.assert_called_once()
     
     def test_polling_service_handles_api_authentication_error(self, test_config):
@@ -228,6 +229,7 @@ class TestAPIPollingIntegration:
             mock_context.return_value.__enter__.return_value = mock_session_db
             mock_context.return_value.__exit__.return_value = None
             mock_session_db.query.return_value.filter.return_value.first.return_value = None
+            mock_session_db.query.return_value.filter.return_value.all.return_value = []
             
             # Create services
             api_client = SensorPushAPI(config_class=test_config)
@@ -243,7 +245,7 @@ class TestAPIPollingIntegration:
             assert mock_session.request.called
             
             # Verify database operations
-            assert mock_session_db.add.call_count > 0
+            assert mock_session_db.execute.call_count > 0
             mock_session_db.commit.assert_called()
     
     def test_polling_service_error_propagation(self, test_config):
@@ -419,6 +421,7 @@ class TestAPIPollingRealWorldScenarios:
                 mock_context.return_value.__enter__.return_value = mock_session_db
                 mock_context.return_value.__exit__.return_value = None
                 mock_session_db.query.return_value.filter.return_value.first.return_value = None
+                mock_session_db.query.return_value.filter.return_value.all.return_value = []
                 mock_handle_error.return_value = 'ERR-12345678'
                 
                 # First call should succeed
@@ -533,9 +536,16 @@ class TestAPIPollingRealWorldScenarios:
                 mock_context.return_value.__enter__.return_value = mock_session_db
                 mock_context.return_value.__exit__.return_value = None
                 mock_session_db.query.return_value.filter.return_value.first.return_value = None
+                mock_session_db.query.return_value.filter.return_value.all.return_value = []
                 
                 polling_service._polling_job()
                 
                 # Should handle large dataset without issues
-                assert mock_session_db.add.call_count >= 100  # At least 100 sensors
+                sensor_rows = [
+                    row
+                    for call_args in mock_session_db.execute.call_args_list
+                    if call_args.args[0].table.name == 'sensors'
+                    for row in call_args.args[1]
+                ]
+                assert len(sensor_rows) >= 100  # At least 100 sensors
                 mock_session_db.commit.assert_called()
\ No newline at end of file
@@ -169,6 +169,23 @@ class TestBaseConfig:
             assert 'SENSORPUSH_USERNAME' in missing
             assert 'SENSORPUSH_PASSWORD' in missing
     
+    def test_validate_required_config_rejects_non_positive_batch_size(self):
+        """Test that a purge batch size below 1 is reported as invalid."""
+        env_vars = {
+            'SENSORPUSH_USERNAME': 'test@example.com',
+            'SENSORPUSH_PASSWORD': 'testpass',
+            'PURGE_BATCH_SIZE': '0'
+        }
+        
+        with patch.dict(os.environ, env_vars, clear=True):
+            import importlib
+            import config
+            importlib.reload(config)
+            
+            missing = config.Config.validate_required_config()
+            
+            assert 'PURGE_BATCH_SIZE (must be at least 1)' in missing
+    
     def test_get_config_summary(self):
         """Test configuration summary generation."""
         env_vars = {
@@ -6,6 +6,7 @@ in isolation using mocks.
 """
 
 import pytest
+import sqlite3
 from datetime import datetime, timedelta
 from unittest.mock import Mock, patch, MagicMock
 from sqlalchemy.exc import SQLAlchemyError
@@ -15,9 +16,12 @@ from data_retention import (
     DataRetentionService,
     purge_old_readings,
     get_data_retention_stats,
-    validate_retention_config
+    validate_retention_config,
+    _delete_readings_in_batches,
+    _run_post_purge_maintenance
 )
 from config import TestingConfig
+from models import Sensor, SensorReading
 
 
 @pytest.mark.unit
@@ -151,6 +155,80 @@ class TestPurgeOldReadings:
             expected_cutoff = mock_now - timedelta(days=12 * 30)
             assert abs((result['cutoff_date'] - expected_cutoff).total_seconds()) < 60  # Within 1 minute
 
+    def test_purge_old_readings_batched_delete(self, test_config, test_db_session):
+        """Test that SQLite purges old readings in batches and keeps recent ones."""
+        test_config.DATA_RETENTION_MONTHS = 12
+        test_db_session.add(Sensor(sensor_id='sensor1', name='Sensor 1', min_temp=0.0,
+                                   max_temp=50.0, min_humidity=0.0, max_humidity=100.0))
+        now = datetime.utcnow()
+        for days_old in (400, 401, 402, 403, 404, 10):
+            test_db_session.add(SensorReading(sensor_id='sensor1', timestamp=now - timedelta(days=days_old),
+                                              temperature=20.0, humidity=40.0))
+        test_db_session.commit()
+
+        with patch('data_retention.get_db_session_context') as mock_context:
+            mock_context.return_value.__enter__.return_value = test_db_session
+            mock_context.return_value.__exit__.return_value = None
+
+            result = purge_old_readings(test_config, batch_size=2)
+
+        assert result['success'] is True
+        assert result['records_deleted'] == 5
+        assert result['maintenance_ran'] is False
+        assert test_db_session.query(SensorReading).count() == 1
+
+    def test_purge_old_readings_rejects_non_positive_batch_size(self, test_config):
+        """Test that a batch size below 1 fails instead of looping forever."""
+        with patch('data_retention.get_db_session_context') as mock_context:
+            mock_session = Mock()
+            mock_context.return_value.__enter__.return_value = mock_session
+            mock_context.return_value.__exit__.return_value = None
+            mock_session.query.return_value.filter.return_value.count.return_value = 5
+
+            result = purge_old_readings(test_config, batch_size=0)
+
+            assert result['success'] is False
+            assert 'batch size' in result['error_message']
+            mock_session.execute.assert_not_called()
+            mock_session.commit.assert_not_called()
+
+    def test_delete_readings_in_batches_rejects_non_positive_batch_size(self):
+        """Test that the batch helper refuses a size that would never terminate."""
+        mock_session = Mock()
+
+        with pytest.raises(ValueError):
+            _delete_readings_in_batches(mock_session, [SensorReading.sensor_id == 'sensor1'], 0)
+
+        mock_session.execute.assert_not_called()
+
+    def test_purge_old_readings_runs_maintenance_above_threshold(self, test_config):
+        """Test that maintenance runs once the purge exceeds the threshold."""
+        with patch('data_retention.get_db_session_context') as mock_context, \
+             patch('data_retention._run_post_purge_maintenance') as mock_maintenance, \
+             patch.object(test_config, 'PURGE_MAINTENANCE_THRESHOLD', 10):
+            mock_session = Mock()
+            mock_context.return_value.__enter__.return_value = mock_session
+            mock_context.return_value.__exit__.return_value = None
+            mock_session.query.return_value.filter.return_value.count.return_value = 50
+            mock_session.query.return_value.filter.return_value.delete.return_value = 50
+            mock_maintenance.return_value = True
+
+            result = purge_old_readings(test_config)
+
+            assert result['maintenance_ran'] is True
+            mock_maintenance.assert_called_once_with(mock_session.get_bind.return_value)
+
+    def test_post_purge_maintenance_swallows_driver_errors(self):
+        """Test that a locked database during maintenance does not fail the purge."""
+        bind = MagicMock()
+        bind.dialect.name = 'sqlite'
+        bind.connect.return_value.__enter__.return_value.exec_driver_sql.side_effect = \
+            sqlite3.OperationalError("database is locked")
+
+        with patch('data_retention.run_incremental_vacuum') as mock_vacuum:
+            assert _run_post_purge_maintenance(bind) is False
+            mock_vacuum.assert_called_once()
+
 
 @pytest.mark.unit
 class TestGetDataRetentionStats:
@@ -163,13 +241,10 @@ class TestGetDataRetentionStats:
             mock_context.return_value.__enter__.return_value = mock_session
             mock_context.return_value.__exit__.return_value = None
             
-            # Mock query results
-            mock_session.query.return_value.scalar.side_effect = [
-                1000,  # total records
-                datetime(2024, 1, 1),  # oldest record
-                datetime(2025, 6, 25)  # newest record
-            ]
-            mock_session.query.return_value.filter.return_value.count.return_value = 100  # eligible for purge
+            # Mock aggregate row: total, oldest, newest, eligible for purge
+            mock_session.execute.return_value.one.return_value = (
+                1000, datetime(2024, 1, 1), datetime(2025, 6, 25), 100
+            )
             
             result = get_data_retention_stats(test_config)
             
@@ -187,9 +262,8 @@ class TestGetDataRetentionStats:
             mock_context.return_value.__enter__.return_value = mock_session
             mock_context.return_value.__exit__.return_value = None
             
-            # Mock empty database
-            mock_session.query.return_value.scalar.side_effect = [0, None, None]
-            mock_session.query.return_value.filter.return_value.count.return_value = 0
+            # Mock empty database (SUM over no rows is NULL)
+            mock_session.execute.return_value.one.return_value = (0, None, None, None)
             
             result = get_data_retention_stats(test_config)
             
@@ -198,6 +272,30 @@ class TestGetDataRetentionStats:
             assert result['newest_record_date'] is None
             assert result['records_eligible_for_purge'] == 0
     
+    def test_get_data_retention_stats_real_database(self, test_config, test_db_session):
+        """Test that the aggregate query returns correct values from SQLite."""
+        test_config.DATA_RETENTION_MONTHS = 12
+        test_db_session.add(Sensor(sensor_id='sensor1', name='Sensor 1', min_temp=0.0,
+                                   max_temp=50.0, min_humidity=0.0, max_humidity=100.0))
+        now = datetime.utcnow()
+        oldest = now - timedelta(days=500)
+        newest = now - timedelta(days=1)
+        for timestamp in (oldest, now - timedelta(days=400), newest):
+            test_db_session.add(SensorReading(sensor_id='sensor1', timestamp=timestamp,
+                                              temperature=20.0, humidity=40.0))
+        test_db_session.commit()
+
+        with patch('data_retention.get_db_session_context') as mock_context:
+            mock_context.return_value.__enter__.return_value = test_db_session
+            mock_context.return_value.__exit__.return_value = None
+
+            result = get_data_retention_stats(test_config)
+
+        assert result['total_records'] == 3
+        assert result['oldest_record_date'] == oldest
+        assert result['newest_record_date'] == newest
+        assert result['records_eligible_for_purge'] == 2
+    
     def test_get_data_retention_stats_minimum_retention_enforced(self):
         """Test that minimum retention is enforced in statistics."""
         with patch('data_retention.Config') as mock_config:
@@ -207,8 +305,7 @@ class TestGetDataRetentionStats:
                 mock_session = Mock()
                 mock_context.return_value.__enter__.return_value = mock_session
                 mock_context.return_value.__exit__.return_value = None
-                mock_session.query.return_value.scalar.side_effect = [0, None, None]
-                mock_session.query.return_value.filter.return_value.count.return_value = 0
+                mock_session.execute.return_value.one.return_value = (0, None, None, None)
                 
                 result = get_data_retention_stats(mock_config)
                 
@@ -221,8 +318,7 @@ class TestGetDataRetentionStats:
                 mock_session = Mock()
                 mock_context.return_value.__enter__.return_value = mock_session
                 mock_context.return_value.__exit__.return_value = None
-                mock_session.query.return_value.scalar.side_effect = [0, None, None]
-                mock_session.query.return_value.filter.return_value.count.return_value = 0
+                mock_session.execute.return_value.one.return_value = (0, None, None, None)
                 
                 result = get_data_retention_stats(mock_config)
                 
@@ -237,7 +333,7 @@ class TestGetDataRetentionStats:
             mock_session = Mock()
             mock_context.return_value.__enter__.return_value = mock_session
             mock_context.return_value.__exit__.return_value = None
-            mock_session.query.side_effect = SQLAlchemyError("Database error")
+            mock_session.execute.side_effect = SQLAlchemyError("Database error")
             mock_handle_error.return_value = 'ERR-12345678'
             
             with pytest.raises(DataRetentionError, match="Failed to get retention stats"):
@@ -253,7 +349,7 @@ class TestGetDataRetentionStats:
             mock_session = Mock()
             mock_context.return_value.__enter__.return_value = mock_session
             mock_context.return_value.__exit__.return_value = None
-            mock_session.query.side_effect = ValueError("Unexpected error")
+            mock_session.execute.side_effect = ValueError("Unexpected error")
             mock_handle_error.return_value = 'ERR-87654321'
             
             with pytest.raises(DataRetentionError, match="Failed to get retention stats"):
@@ -385,7 +481,7 @@ class TestDataRetentionErrorHandling:
             assert 'Database error' in result['error_message']
     
     def test_get_data_retention_stats_partial_failure(self, test_config):
-        """Test statistics when some queries fail."""
+        """Test statistics when fetching the aggregate row fails."""
         with patch('data_retention.get_db_session_context') as mock_context, \
              patch('data_retention.handle_polling_error') as mock_handle_error:
             
@@ -393,8 +489,8 @@ class TestDataRetentionErrorHandling:
             mock_context.return_value.__enter__.return_value = mock_session
             mock_context.return_value.__exit__.return_value = None
             
-            # First query succeeds, second fails
-            mock_session.query.return_value.scalar.side_effect = [1000, SQLAlchemyError("Query failed")]
+            # Aggregate query fails while fetching the row
+            mock_session.execute.return_value.one.side_effect = SQLAlchemyError("Query failed")
             mock_handle_error.return_value = 'ERR-12345678'
             
             with pytest.raises(DataRetentionError):
@@ -477,8 +573,7 @@ class TestDataRetentionUtilityFunctions:
                 mock_session = Mock()
                 mock_context.return_value.__enter__.return_value = mock_session
                 mock_context.return_value.__exit__.return_value = None
-                mock_session.query.return_value.scalar.side_effect = [0, None, None]
-                mock_session.query.return_value.filter.return_value.count.return_value = 0
+                mock_session.execute.return_value.one.return_value = (0, None, None, None)
                 
                 result = get_data_retention_stats()
                 
@@ -622,6 +717,33 @@ class TestDataRetentionService:
             assert result['records_deleted'] == 0
             assert 'Database error' in result['error_message']
     
+    def test_delete_readings_batched_on_real_database(self, test_config, test_db_session):
+        """Test sensor and date range deletions remove matching rows in batches."""
+        for sensor_id in ('sensor1', 'sensor2'):
+            test_db_session.add(Sensor(sensor_id=sensor_id, name=sensor_id, min_temp=0.0,
+                                       max_temp=50.0, min_humidity=0.0, max_humidity=100.0))
+        base = datetime(2025, 1, 1)
+        for day in range(5):
+            for sensor_id in ('sensor1', 'sensor2'):
+                test_db_session.add(SensorReading(sensor_id=sensor_id, timestamp=base + timedelta(days=day),
+                                                  temperature=20.0, humidity=40.0))
+        test_db_session.commit()
+        
+        with patch('data_retention.get_db_session_context') as mock_context, \
+             patch.object(test_config, 'PURGE_BATCH_SIZE', 2):
+            mock_context.return_value.__enter__.return_value = test_db_session
+            mock_context.return_value.__exit__.return_value = None
+            
+            service = DataRetentionService(test_config)
+            sensor_result = service.delete_readings_by_sensor('sensor1', end_date=base + timedelta(days=2))
+            range_result = service.delete_readings_by_date_range(base, base + timedelta(days=4), ['sensor2'])
+        
+        assert sensor_result['records_deleted'] == 3
+        assert range_result['records_deleted'] == 5
+        remaining = test_db_session.query(SensorReading).all()
+        assert len(remaining) == 2
+        assert {reading.sensor_id for reading in remaining} == {'sensor1'}
+    
     def test_delete_readings_by_date_range_success(self, test_config):
         """Test successful deletion by date range."""
         start_date = datetime(2025, 1, 1)
@@ -713,7 +835,39 @@ class TestDataRetentionService:
             assert result['success'] is False
             assert result['records_deleted'] == 0
             assert 'Database error' in result['error_message']
-    
+
+    def test_delete_readings_for_sensors_success(self, test_config):
+        """Test concurrent deletion of readings for several sensors."""
+        service = DataRetentionService(test_config)
+
+        def fake_delete(sensor_id):
+            return {'success': True, 'records_deleted': 10, 'sensor_id': sensor_id}
+
+        with patch.object(service, 'delete_readings_by_sensor', side_effect=fake_delete) as mock_delete:
+            result = service.delete_readings_for_sensors(['sensor1', 'sensor2', 'sensor3'])
+
+        assert result['success'] is True
+        assert result['records_deleted'] == 30
+        assert set(result['results']) == {'sensor1', 'sensor2', 'sensor3'}
+        assert result['error_message'] is None
+        assert mock_delete.call_count == 3
+
+    def test_delete_readings_for_sensors_partial_failure(self, test_config):
+        """Test that a failed sensor is reported without hiding the others."""
+        service = DataRetentionService(test_config)
+
+        def fake_delete(sensor_id):
+            if sensor_id == 'sensor2':
+                return {'success': False, 'records_deleted': 0, 'sensor_id': sensor_id}
+            return {'success': True, 'records_deleted': 5, 'sensor_id': sensor_id}
+
+        with patch.object(service, 'delete_readings_by_sensor', side_effect=fake_delete):
+            result = service.delete_readings_for_sensors(['sensor1', 'sensor2'])
+
+        assert result['success'] is False
+        assert result['records_deleted'] == 5
+        assert 'sensor2' in result['error_message']
+
     def test_get_sensor_data_summary_success(self, test_config):
         """Test successful retrieval of sensor data summary."""
         with patch('data_retention.get_db_session_context') as mock_context:
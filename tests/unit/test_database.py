@@ -11,15 +11,19 @@ import tempfile
 from unittest.mock import Mock, patch, MagicMock
 from sqlalchemy.exc import SQLAlchemyError
 from sqlalchemy import create_engine, text
+from sqlalchemy.pool import StaticPool
 
 from database import (
     init_database,
+    migrate_database,
     get_db_session,
     get_db_session_context,
     close_db_connection,
-    test_db_connection
+    test_db_connection,
+    run_incremental_vacuum,
+    CURRENT_SCHEMA_VERSION
 )
-from models import Base, Sensor, SensorReading, Error
+from models import Base, Sensor, SensorReading, Error, bulk_insert_readings
 from config import TestingConfig
 
 
@@ -99,6 +103,147 @@ class TestDatabaseInitialization:
             assert result is False
 
 
+@pytest.mark.unit
+class TestDatabaseMigration:
+    """Test schema migration of older databases."""
+    
+    def test_migrate_database_adds_missing_columns(self):
+        """Test missing columns are detected and added."""
+        engine = create_engine('sqlite:///:memory:', poolclass=StaticPool)
+        with engine.begin() as conn:
+            conn.execute(text("CREATE TABLE sensor_readings (id INTEGER PRIMARY KEY, temperature FLOAT)"))
+            conn.execute(text("CREATE TABLE errors (id INTEGER PRIMARY KEY, timestamp DATETIME, message TEXT)"))
+        
+        try:
+            with patch('database.engine', engine):
+                assert migrate_database() is True
+            
+            with engine.connect() as conn:
+                reading_columns = {row[1] for row in conn.execute(text("PRAGMA table_info(sensor_readings)"))}
+                error_columns = {row[1] for row in conn.execute(text("PRAGMA table_info(errors)"))}
+                
+                assert 'battery_voltage' in reading_columns
+                assert {'level', 'source', 'count', 'last_seen'}.issubset(error_columns)
+                error_indexes = {row[1] for row in conn.execute(text("PRAGMA index_list(errors)"))}
+                assert 'ix_errors_ts' in error_indexes
+                assert conn.execute(text("PRAGMA user_version")).scalar() == CURRENT_SCHEMA_VERSION
+                assert not conn.connection.driver_connection.in_transaction
+        finally:
+            engine.dispose()
+    
+    def test_migrate_database_skips_current_schema_version(self):
+        """Test migrations are skipped once the schema version is current."""
+        with patch('database.engine') as mock_engine:
+            mock_engine.dialect.name = 'sqlite'
+            mock_conn = mock_engine.begin.return_value.__enter__.return_value
+            mock_conn.execute.return_value.scalar.return_value = CURRENT_SCHEMA_VERSION
+            
+            assert migrate_database() is True
+        
+        # Only the user_version lookup should have been issued
+        mock_conn.execute.assert_called_once()
+        mock_conn.exec_driver_sql.assert_not_called()
+    
+    def test_migrate_database_skips_non_sqlite_backends(self):
+        """Test the SQLite-only migrations are not attempted on other backends."""
+        with patch('database.engine') as mock_engine:
+            mock_engine.dialect.name = 'postgresql'
+            
+            assert migrate_database() is True
+        
+        mock_engine.begin.assert_not_called()
+    
+    def test_migrate_database_makes_reading_timestamps_unique(self):
+        """Test duplicate readings are removed before the unique index is built."""
+        engine = create_engine('sqlite:///:memory:', poolclass=StaticPool)
+        with engine.begin() as conn:
+            conn.execute(text(
+                "CREATE TABLE sensor_readings (id INTEGER PRIMARY KEY, sensor_id VARCHAR, "
+                "timestamp DATETIME, temperature SMALLINT, humidity SMALLINT, battery_voltage FLOAT)"
+            ))
+            conn.execute(text("CREATE INDEX ix_sensor_readings_sensor_ts ON sensor_readings (sensor_id, timestamp)"))
+            conn.execute(text(
+                "CREATE TABLE errors (id INTEGER PRIMARY KEY, timestamp DATETIME, message TEXT, "
+                "level VARCHAR, source VARCHAR, count INTEGER, last_seen DATETIME)"
+            ))
+            conn.execute(text(
+                "INSERT INTO sensor_readings (id, sensor_id, timestamp, temperature, humidity) VALUES "
+                "(1, 's1', '2024-01-01 00:00:00', 2000, 5000), "
+                "(2, 's1', '2024-01-01 00:00:00', 2000, 5000), "
+                "(3, 's2', '2024-01-01 00:00:00', 2100, 5100)"
+            ))
+            conn.execute(text("PRAGMA user_version = 4"))
+        
+        try:
+            with patch('database.engine', engine):
+                assert migrate_database() is True
+            
+            with engine.connect() as conn:
+                ids = [row[0] for row in conn.execute(text("SELECT id FROM sensor_readings ORDER BY id"))]
+                indexes = {row[1]: row[2] for row in conn.execute(text("PRAGMA index_list(sensor_readings)"))}
+                
+                assert ids == [1, 3]
+                assert 'ix_sensor_readings_sensor_ts' not in indexes
+                assert indexes['uq_sensor_readings_sensor_ts'] == 1
+        finally:
+            engine.dispose()
+    
+    def test_migrate_database_rebuilds_readings_with_cascade(self):
+        """Test readings tables without ON DELETE CASCADE are rebuilt with it."""
+        engine = create_engine('sqlite:///:memory:', poolclass=StaticPool)
+        with engine.begin() as conn:
+            conn.execute(text(
+                "CREATE TABLE sensors (sensor_id VARCHAR PRIMARY KEY, name VARCHAR, active BOOLEAN, "
+                "min_temp FLOAT, max_temp FLOAT, min_humidity FLOAT, max_humidity FLOAT)"
+            ))
+            conn.execute(text(
+                "CREATE TABLE sensor_readings (id INTEGER PRIMARY KEY, "
+                "sensor_id VARCHAR NOT NULL REFERENCES sensors (sensor_id), "
+                "timestamp DATETIME, temperature SMALLINT, humidity SMALLINT, battery_voltage FLOAT)"
+            ))
+            conn.execute(text("CREATE UNIQUE INDEX uq_sensor_readings_sensor_ts ON sensor_readings (sensor_id, timestamp)"))
+            conn.execute(text(
+                "CREATE TABLE errors (id INTEGER PRIMARY KEY, timestamp DATETIME, message TEXT, "
+                "level VARCHAR, source VARCHAR, count INTEGER, last_seen DATETIME)"
+            ))
+            conn.execute(text("INSERT INTO sensors (sensor_id, name, active) VALUES ('s1', 'Oven', 1)"))
+            conn.execute(text(
+                "INSERT INTO sensor_readings (id, sensor_id, timestamp, temperature, humidity) VALUES "
+                "(1, 's1', '2024-01-01 00:00:00', 2000, 5000), "
+                "(2, 's1', '2024-01-01 00:01:00', 2010, 5010), "
+                "(3, 'gone', '2024-01-01 00:00:00', 2100, 5100)"
+            ))
+            conn.execute(text("PRAGMA user_version = 5"))
+        
+        try:
+            with patch('database.engine', engine):
+                assert migrate_database() is True
+            
+            with engine.connect() as conn:
+                on_delete = {row[2]: row[6] for row in conn.execute(text("PRAGMA foreign_key_list(sensor_readings)"))}
+                indexes = {row[1] for row in conn.execute(text("PRAGMA index_list(sensor_readings)"))}
+                ids = [row[0] for row in conn.execute(text("SELECT id FROM sensor_readings ORDER BY id"))]
+                
+                assert on_delete['sensors'] == 'CASCADE'
+                assert {'uq_sensor_readings_sensor_ts', 'ix_sensor_readings_ts'} <= indexes
+                assert ids == [1, 2]
+                assert not conn.execute(text(
+                    "SELECT name FROM sqlite_master WHERE name = 'sensor_readings_old'"
+                )).first()
+                
+                conn.exec_driver_sql("PRAGMA foreign_keys=ON")
+                conn.execute(text("DELETE FROM sensors WHERE sensor_id = 's1'"))
+                assert conn.execute(text("SELECT COUNT(*) FROM sensor_readings")).scalar() == 0
+        finally:
+            engine.dispose()
+    
+    def test_run_incremental_vacuum_skipped_for_memory_database(self):
+        """Test incremental vacuum is a no-op for in-memory databases."""
+        with patch('database.engine') as mock_engine:
+            assert run_incremental_vacuum() is False
+            mock_engine.raw_connection.assert_not_called()
+
+
 @pytest.mark.unit
 class TestDatabaseSessions:
     """Test database session management."""
@@ -139,6 +284,24 @@ class TestDatabaseSessions:
             # Session should still be closed even with exception
             mock_session.close.assert_called_once()
 
+    def test_get_db_session_context_nested_uses_separate_session(self):
+        """Test nested session contexts do not share the scoped session."""
+        with patch('database.SessionLocal') as mock_session_local, \
+             patch('database._session_factory') as mock_factory:
+            outer_session = Mock()
+            inner_session = Mock()
+            mock_session_local.return_value = outer_session
+            mock_factory.return_value = inner_session
+
+            with get_db_session_context() as outer:
+                with get_db_session_context() as inner:
+                    assert inner == inner_session
+                assert outer == outer_session
+                outer_session.close.assert_not_called()
+
+            inner_session.close.assert_called_once()
+            outer_session.close.assert_called_once()
+
 
 @pytest.mark.unit
 class TestDatabaseConnection:
@@ -165,27 +328,23 @@ class TestDatabaseConnection:
     
     def test_test_db_connection_success(self):
         """Test successful database connection test."""
-        with patch('database.get_db_session_context') as mock_context:
-            mock_session = Mock()
-            mock_context.return_value.__enter__.return_value = mock_session
-            mock_context.return_value.__exit__.return_value = None
-            mock_session.execute.return_value = None
+        with patch('database.engine') as mock_engine:
+            mock_conn = mock_engine.connect.return_value.__enter__.return_value
+            mock_conn.scalar.return_value = 1
             
             result = test_db_connection()
             
             assert result is True
-            mock_session.execute.assert_called_once()
+            mock_conn.scalar.assert_called_once()
             # Verify the SQL query is correct
-            call_args = mock_session.execute.call_args[0][0]
+            call_args = mock_conn.scalar.call_args[0][0]
             assert str(call_args) == "SELECT 1"
     
     def test_test_db_connection_failure(self):
         """Test database connection test failure."""
-        with patch('database.get_db_session_context') as mock_context:
-            mock_session = Mock()
-            mock_context.return_value.__enter__.return_value = mock_session
-            mock_context.return_value.__exit__.return_value = None
-            mock_session.execute.side_effect = SQLAlchemyError("Connection failed")
+        with patch('database.engine') as mock_engine:
+            mock_conn = mock_engine.connect.return_value.__enter__.return_value
+            mock_conn.scalar.side_effect = SQLAlchemyError("Connection failed")
             
             result = test_db_connection()
             
@@ -377,6 +536,85 @@ class TestDatabaseIntegrationWithModels:
         assert retrieved_error.message == 'Test error message'
         assert retrieved_error.stack_trace == 'Test stack trace'
     
+    def test_error_stack_trace_stored_compressed(self, test_db_session):
+        """Test stack traces are compressed on disk and read back as text."""
+        from sqlalchemy import text as sql_text
+        
+        stack = 'Traceback (most recent call last):\n  File "app.py", line 1\n' * 40
+        test_db_session.add(Error(error_id='ERR-ZIPPED01', message='Zipped', stack_trace=stack))
+        test_db_session.commit()
+        
+        raw = test_db_session.execute(
+            sql_text("SELECT stack_trace FROM errors WHERE error_id = 'ERR-ZIPPED01'")
+        ).scalar()
+        assert isinstance(raw, bytes)
+        assert len(raw) < len(stack) // 4
+        
+        test_db_session.expire_all()
+        retrieved_error = test_db_session.query(Error).filter_by(error_id='ERR-ZIPPED01').one()
+        assert retrieved_error.stack_trace == stack
+    
+    def test_reading_values_stored_as_hundredths(self, test_db_session):
+        """Test temperature and humidity are stored as fixed-point integers."""
+        from datetime import datetime
+        from sqlalchemy import text as sql_text
+        
+        test_db_session.add(Sensor(
+            sensor_id='SCALE_001',
+            name='Scaled Sensor',
+            min_temp=0.0,
+            max_temp=50.0,
+            min_humidity=0.0,
+            max_humidity=100.0
+        ))
+        test_db_session.add(SensorReading(
+            sensor_id='SCALE_001',
+            timestamp=datetime(2025, 1, 1, 12, 0, 0),
+            temperature=21.456,
+            humidity=48.5
+        ))
+        test_db_session.commit()
+        
+        raw = test_db_session.execute(
+            sql_text("SELECT temperature, humidity FROM sensor_readings WHERE sensor_id = 'SCALE_001'")
+        ).one()
+        assert tuple(raw) == (2146, 4850)
+        
+        test_db_session.expire_all()
+        reading = test_db_session.query(SensorReading).filter_by(sensor_id='SCALE_001').one()
+        assert reading.temperature == 21.46
+        assert reading.humidity == 48.5
+    
+    def test_bulk_insert_readings(self, test_db_session):
+        """Test readings are inserted in chunks and counted."""
+        from datetime import datetime, timedelta
+        
+        test_db_session.add(Sensor(
+            sensor_id='BULK_001',
+            name='Bulk Sensor',
+            min_temp=0.0,
+            max_temp=50.0,
+            min_humidity=0.0,
+            max_humidity=100.0
+        ))
+        base_time = datetime(2025, 1, 1, 12, 0, 0)
+        rows = ({
+            'sensor_id': 'BULK_001',
+            'timestamp': base_time + timedelta(minutes=i),
+            'temperature': 20.0,
+            'humidity': 40.0
+        } for i in range(7))
+        
+        assert bulk_insert_readings(test_db_session, rows, chunk_size=3) == 7
+        test_db_session.commit()
+        
+        assert test_db_session.query(SensorReading).filter_by(sensor_id='BULK_001').count() == 7
+        
+        # Already-stored samples are skipped by the database and not counted
+        repeat = [{'sensor_id': 'BULK_001', 'timestamp': base_time, 'temperature': 21.0, 'humidity': 41.0}]
+        assert bulk_insert_readings(test_db_session, repeat * 2) == 0
+        assert test_db_session.query(SensorReading).filter_by(sensor_id='BULK_001').count() == 7
+    
     def test_sensor_reading_relationship(self, test_db_session):
         """Test the relationship between Sensor and SensorReading models."""
         from datetime import datetime
@@ -442,11 +680,9 @@ class TestDatabaseErrorScenarios:
     
     def test_connection_test_with_invalid_sql(self):
         """Test connection test with invalid SQL execution."""
-        with patch('database.get_db_session_context') as mock_context:
-            mock_session = Mock()
-            mock_context.return_value.__enter__.return_value = mock_session
-            mock_context.return_value.__exit__.return_value = None
-            mock_session.execute.side_effect = Exception("Invalid SQL")
+        with patch('database.engine') as mock_engine:
+            mock_conn = mock_engine.connect.return_value.__enter__.return_value
+            mock_conn.scalar.side_effect = Exception("Invalid SQL")
             
             result = test_db_connection()
             
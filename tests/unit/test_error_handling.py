@@ -6,6 +6,7 @@ Tests error logging, storage, and handler functionality in isolation using mocks
 
 import pytest
 import logging
+import time
 import uuid
 from datetime import datetime
 from unittest.mock import Mock, patch, MagicMock, mock_open
@@ -20,9 +21,20 @@ from error_handling import (
     log_info,
     log_warning,
     log_debug,
-    log_error
+    log_error,
+    BufferedRotatingFileHandler,
+    _LOGGERS
 )
 from config import TestingConfig
+from models import Error
+
+
+@pytest.fixture(autouse=True)
+def clear_logger_cache():
+    """Ensure each test configures logging from scratch."""
+    _LOGGERS.clear()
+    yield
+    _LOGGERS.clear()
 
 
 @pytest.mark.unit
@@ -66,7 +78,7 @@ class TestErrorHandler:
         test_config.DEBUG = True
         
         with patch('error_handling.logging.getLogger') as mock_get_logger, \
-             patch('error_handling.logging.FileHandler') as mock_file_handler, \
+             patch('error_handling.BufferedRotatingFileHandler') as mock_file_handler, \
              patch('error_handling.logging.StreamHandler') as mock_stream_handler:
             
             mock_logger = Mock()
@@ -92,6 +104,89 @@ class TestErrorHandler:
             # Should return existing logger without modification
             assert handler.logger == mock_logger
     
+    def test_setup_logging_memoized_per_config(self, test_config):
+        """Test that handlers are only configured once for the same settings."""
+        with patch('error_handling.logging.getLogger') as mock_get_logger, \
+             patch('error_handling.BufferedRotatingFileHandler') as mock_file_handler:
+            mock_logger = Mock()
+            mock_logger.handlers = []
+            mock_get_logger.return_value = mock_logger
+            
+            first = ErrorHandler(config_class=test_config)
+            second = ErrorHandler(config_class=test_config)
+            
+            assert first.logger is second.logger
+            mock_get_logger.assert_called_once()
+            mock_file_handler.assert_called_once()
+            assert mock_file_handler.call_args.kwargs['delay'] is True
+    
+    def test_buffered_file_handler_flushes_on_error(self, tmp_path):
+        """Test the file handler buffers routine records and flushes errors."""
+        log_file = tmp_path / 'buffered.log'
+        file_handler = BufferedRotatingFileHandler(str(log_file), maxBytes=0, encoding='utf-8', delay=True)
+        logger = logging.getLogger('bakery_sensors.test_buffered')
+        logger.propagate = False
+        logger.addHandler(file_handler)
+        
+        try:
+            logger.warning("buffered warning")
+            assert not log_file.exists() or log_file.read_text(encoding='utf-8') == ''
+            
+            logger.error("flushed error")
+            contents = log_file.read_text(encoding='utf-8')
+            assert "buffered warning" in contents
+            assert "flushed error" in contents
+        finally:
+            logger.removeHandler(file_handler)
+            file_handler.close()
+    
+    def test_buffered_file_handler_rotates_by_size(self, tmp_path):
+        """Test the buffered file handler still rotates once maxBytes is reached."""
+        log_file = tmp_path / 'rotating.log'
+        file_handler = BufferedRotatingFileHandler(str(log_file), maxBytes=200, backupCount=1,
+                                                   encoding='utf-8', delay=True)
+        record = logging.LogRecord('bakery_sensors', logging.INFO, __file__, 1, 'x' * 60, None, None)
+        
+        try:
+            for _ in range(5):
+                file_handler.emit(record)
+        finally:
+            file_handler.close()
+        
+        assert (tmp_path / 'rotating.log.1').exists()
+        assert log_file.stat().st_size <= 200
+    
+    def test_buffered_file_handler_flushes_after_interval(self, tmp_path):
+        """Test buffered records reach the file without waiting for an error."""
+        log_file = tmp_path / 'timed.log'
+        file_handler = BufferedRotatingFileHandler(str(log_file), maxBytes=0, encoding='utf-8', delay=True)
+        record = logging.LogRecord('bakery_sensors', logging.INFO, __file__, 1, 'quiet info', None, None)
+        
+        try:
+            with patch('error_handling.LOG_FLUSH_INTERVAL', 0.05):
+                file_handler.handle(record)
+            
+            deadline = time.monotonic() + 2
+            while time.monotonic() < deadline and 'quiet info' not in log_file.read_text(encoding='utf-8'):
+                time.sleep(0.01)
+            assert 'quiet info' in log_file.read_text(encoding='utf-8')
+        finally:
+            file_handler.close()
+    
+    def test_buffered_file_handler_counts_encoded_bytes(self, tmp_path):
+        """Test the rollover size check counts bytes, not characters."""
+        log_file = tmp_path / 'bytes.log'
+        file_handler = BufferedRotatingFileHandler(str(log_file), maxBytes=0, encoding='utf-8', delay=True)
+        record = logging.LogRecord('bakery_sensors', logging.INFO, __file__, 1, 'crème brûlée ☕', None, None)
+        
+        try:
+            file_handler.emit(record)
+            assert file_handler._bytes_written == len('crème brûlée ☕\n'.encode('utf-8'))
+        finally:
+            file_handler.close()
+        
+        assert log_file.stat().st_size == file_handler._bytes_written
+    
     def test_setup_logging_file_handler_error(self, test_config):
         """Test logging setup when file handler creation fails."""
         test_config.LOG_LEVEL = 'INFO'
@@ -99,7 +194,7 @@ class TestErrorHandler:
         test_config.DEBUG = False
         
         with patch('error_handling.logging.getLogger') as mock_get_logger, \
-             patch('error_handling.logging.FileHandler') as mock_file_handler, \
+             patch('error_handling.BufferedRotatingFileHandler') as mock_file_handler, \
              patch('builtins.print') as mock_print:
             
             mock_logger = Mock()
@@ -143,11 +238,28 @@ class TestErrorHandler:
             mock_store.assert_called_once()
             
             # Verify log message content
-            log_call = handler.logger.error.call_args[0][0]
+            log_args = handler.logger.error.call_args[0]
+            log_call = log_args[0] % log_args[1:]
             assert error_id in log_call
             assert "Test context: Test error" in log_call
             assert "Additional data" in log_call
     
+    def test_log_and_store_error_formats_active_traceback(self, test_config):
+        """Test the stored stack trace is the traceback of the handled exception."""
+        with patch.object(ErrorHandler, '_store_error_in_db') as mock_store:
+            handler = ErrorHandler(config_class=test_config)
+            handler.logger = Mock()
+            
+            try:
+                raise ValueError("Traceback test")
+            except ValueError as e:
+                handler.log_and_store_error(e)
+            
+            stack_trace = mock_store.call_args[0][2]
+            assert isinstance(stack_trace, str)
+            assert "Traceback (most recent call last)" in stack_trace
+            assert "ValueError: Traceback test" in stack_trace
+    
     def test_log_and_store_error_db_storage_failure(self, test_config):
         """Test error logging when database storage fails."""
         with patch.object(ErrorHandler, '_store_error_in_db') as mock_store:
@@ -168,6 +280,67 @@ class TestErrorHandler:
             critical_call = handler.logger.critical.call_args[0][0]
             assert "Failed to store error" in critical_call
     
+    def test_log_and_store_error_queued_batch_write(self, test_config):
+        """Test queued errors are written together by the background writer."""
+        with patch('error_handling.get_db_session_context') as mock_context, \
+             patch('error_handling.atexit.register'), \
+             patch.object(test_config, 'ERROR_QUEUE_ENABLED', True):
+            mock_session = Mock()
+            mock_context.return_value.__enter__.return_value = mock_session
+            mock_context.return_value.__exit__.return_value = None
+            
+            handler = ErrorHandler(config_class=test_config)
+            handler.logger = Mock()
+            
+            error_ids = [handler.log_and_store_error(ValueError(f"Error {i}")) for i in range(3)]
+            handler._drain_and_close()
+            
+            assert not handler._flush_thread.is_alive()
+            stored_ids = [
+                entry['error_id']
+                for call in mock_session.execute.call_args_list
+                if len(call[0]) == 2
+                for entry in call[0][1]
+            ]
+            assert stored_ids == error_ids
+            mock_session.commit.assert_called()
+            handler.logger.critical.assert_not_called()
+    
+    def test_log_and_store_error_repeats_bump_count(self, test_config, test_db_session):
+        """Test repeated identical errors update one record instead of inserting more."""
+        with patch('error_handling.get_db_session_context') as mock_context:
+            mock_context.return_value.__enter__.return_value = test_db_session
+            mock_context.return_value.__exit__.return_value = None
+            
+            handler = ErrorHandler(config_class=test_config)
+            handler.logger = Mock()
+            
+            error_ids = [handler.log_and_store_error(ConnectionError("API unreachable"), "Polling") for _ in range(3)]
+            other_id = handler.log_and_store_error(ConnectionError("API timeout"), "Polling")
+        
+        assert len(set(error_ids)) == 1
+        assert other_id != error_ids[0]
+        
+        stored = {error.error_id: error for error in test_db_session.query(Error).all()}
+        assert len(stored) == 2
+        assert stored[error_ids[0]].count == 3
+        assert stored[error_ids[0]].last_seen is not None
+        assert stored[other_id].count == 1
+    
+    def test_log_and_store_error_failed_store_not_deduplicated(self, test_config):
+        """Test an error whose row was never stored is not used for deduplication."""
+        handler = ErrorHandler(config_class=test_config)
+        handler.logger = Mock()
+        
+        with patch.object(handler, '_store_error_in_db', side_effect=SQLAlchemyError("database is locked")):
+            first_id = handler.log_and_store_error(ConnectionError("API unreachable"), "Polling")
+        
+        with patch.object(handler, '_store_error_in_db') as mock_store:
+            second_id = handler.log_and_store_error(ConnectionError("API unreachable"), "Polling")
+        
+        assert second_id != first_id
+        mock_store.assert_called_once()
+    
     def test_store_error_in_db_success(self, test_config):
         """Test successful error storage in database."""
         with patch('error_handling.get_db_session_context') as mock_context:
@@ -219,7 +392,7 @@ class TestErrorHandler:
         
         handler.log_info("Test message", "Test context")
         
-        handler.logger.info.assert_called_once_with("Test context: Test message")
+        handler.logger.info.assert_called_once_with("%s: %s", "Test context", "Test message")
     
     def test_log_info_no_context(self, test_config):
         """Test info logging without context."""
@@ -237,7 +410,7 @@ class TestErrorHandler:
         
         handler.log_warning("Test warning", "Test context")
         
-        handler.logger.warning.assert_called_once_with("Test context: Test warning")
+        handler.logger.warning.assert_called_once_with("%s: %s", "Test context", "Test warning")
     
     def test_log_debug(self, test_config):
         """Test debug logging."""
@@ -246,7 +419,18 @@ class TestErrorHandler:
         
         handler.log_debug("Test debug", "Test context")
         
-        handler.logger.debug.assert_called_once_with("Test context: Test debug")
+        handler.logger.debug.assert_called_once_with("%s: %s", "Test context", "Test debug")
+    
+    def test_log_debug_lazy_args(self, test_config):
+        """Test placeholder values are passed through for lazy formatting."""
+        handler = ErrorHandler(config_class=test_config)
+        handler.logger = Mock()
+        
+        handler.log_debug("Found %d sensors", "Test context", 3)
+        handler.log_debug("Found %d sensors", None, 4)
+        
+        handler.logger.debug.assert_any_call("%s: Found %d sensors", "Test context", 3)
+        handler.logger.debug.assert_any_call("Found %d sensors", 4)
 
 
 @pytest.mark.unit
@@ -292,12 +476,13 @@ class TestErrorContext:
             mock_handler = Mock()
             mock_get_handler.return_value = mock_handler
             
-            with error_context("Test context") as error_id:
-                assert error_id is None
+            with error_context("Test context") as ctx:
+                assert ctx.error_id is None
                 # Do some work without exception
                 pass
             
             # Handler should not be called
+            assert ctx.error_id is None
             mock_handler.log_and_store_error.assert_not_called()
     
     def test_error_context_with_exception(self):
@@ -310,13 +495,14 @@ class TestErrorContext:
             test_exception = ValueError("Test error")
             
             with pytest.raises(ValueError):
-                with error_context("Test context", {"key": "value"}) as error_id:
+                with error_context("Test context", {"key": "value"}) as ctx:
                     raise test_exception
             
             # Handler should be called with exception details
             mock_handler.log_and_store_error.assert_called_once_with(
                 test_exception, "Test context", {"key": "value"}
             )
+            assert ctx.error_id == 'ERR-12345678'
     
     def test_error_context_with_additional_data(self):
         """Test error context with additional data."""
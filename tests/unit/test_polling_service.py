@@ -13,7 +13,9 @@ from apscheduler.events import JobExecutionEvent
 from polling_service import (
     PollingService,
     PollingServiceError,
-    create_polling_service
+    create_polling_service,
+    acquire_polling_lock,
+    parse_observed
 )
 from sensorpush_api import SensorPushAPIError, AuthenticationError, APIConnectionError
 from data_retention import DataRetentionError
@@ -634,6 +636,30 @@ def test_create_polling_service_function():
         mock_service_class.assert_called_once_with(test_config, None)
 
 
+@pytest.mark.unit
+def test_acquire_polling_lock_single_owner(tmp_path):
+    """Only one holder of the polling lock file may run the poller."""
+    import fcntl
+    import os
+    
+    lock_path = str(tmp_path / 'polling.lock')
+    assert acquire_polling_lock(None) is True
+    
+    # Another worker already holds the lock
+    other_fd = os.open(lock_path, os.O_RDWR | os.O_CREAT)
+    fcntl.flock(other_fd, fcntl.LOCK_EX | fcntl.LOCK_NB)
+    try:
+        with patch('polling_service._polling_lock_fd', None):
+            assert acquire_polling_lock(lock_path) is False
+    finally:
+        os.close(other_fd)
+    
+    with patch('polling_service._polling_lock_fd', None):
+        assert acquire_polling_lock(lock_path) is True
+        import polling_service
+        os.close(polling_service._polling_lock_fd)
+
+
 @pytest.mark.unit
 class TestPollingServiceErrorScenarios:
     """Test various error scenarios."""
@@ -667,4 +693,84 @@ class TestPollingServiceErrorScenarios:
                 mock_handle_error.return_value = 'ERR-12345678'
                 
                 with pytest.raises(RuntimeError):
-                    service._polling_job()
\ No newline at end of file
+                    service._polling_job()
+
+
+@pytest.mark.unit
+def test_parse_observed_returns_naive_utc():
+    """Observed timestamps are normalised to the naive UTC values the DB stores."""
+    expected = datetime(2024, 1, 1, 12, 0, 0)
+    assert parse_observed('2024-01-01T12:00:00Z') == expected
+    assert parse_observed('2024-01-01T14:00:00+02:00') == expected
+    assert parse_observed('2024-01-01T12:00:00') == expected
+    assert parse_observed('2024-01-01T12:00:00Z').tzinfo is None
+
+
+@pytest.mark.unit
+def test_sensor_names_cached_until_unknown_sensor(test_config):
+    """Sensor names are reused from the cache unless a requested sensor is missing."""
+    mock_api_client = Mock()
+    service = PollingService(config_class=test_config, api_client=mock_api_client)
+    service.invalidate_caches()
+    mock_api_client.get_sensors.return_value = {'s1': {'name': 'Oven'}}
+    
+    assert service._get_sensor_names(['s1']) == {'s1': 'Oven'}
+    assert service._get_sensor_names(['s1']) == {'s1': 'Oven'}
+    assert mock_api_client.get_sensors.call_count == 1
+    
+    mock_api_client.get_sensors.return_value = {'s1': {'name': 'Oven'}, 's2': {'name': 'Proofer'}}
+    assert service._get_sensor_names(['s2'])['s2'] == 'Proofer'
+    assert mock_api_client.get_sensors.call_count == 2
+    
+    service.invalidate_caches()
+
+
+@pytest.mark.unit
+def test_apply_to_job_uses_cached_job_handle(test_config):
+    """Job triggers reuse the handle from add_job and only look up stale jobs."""
+    from apscheduler.jobstores.base import JobLookupError
+    
+    service = PollingService(config_class=test_config, api_client=Mock())
+    service.scheduler = Mock()
+    cached_job = Mock()
+    service._jobs[service._job_id] = cached_job
+    
+    assert service._apply_to_job(service._job_id, lambda job: job.modify(paused=True)) is True
+    cached_job.modify.assert_called_once_with(paused=True)
+    service.scheduler.get_job.assert_not_called()
+    
+    # A removed job falls back to the scheduler lookup
+    cached_job.modify.side_effect = JobLookupError(service._job_id)
+    service.scheduler.get_job.return_value = None
+    assert service._apply_to_job(service._job_id, lambda job: job.modify(paused=True)) is False
+    assert service._job_id not in service._jobs
+
+
+@pytest.mark.unit
+def test_polling_job_signals_completion(test_config):
+    """Each polling run sets the completion event, even when the API fails."""
+    api_client = Mock()
+    api_client.get_samples.side_effect = APIConnectionError("offline")
+    api_client.get_devices_sensors.return_value = {}
+    service = PollingService(config_class=test_config, api_client=api_client)
+    
+    with patch('polling_service.handle_polling_error', return_value='ERR'):
+        service._polling_job()
+    
+    assert service._poll_complete.wait(timeout=1) is True
+
+
+@pytest.mark.unit
+def test_settings_check_job_applies_persisted_interval(test_config):
+    """The owning worker reschedules polling when another worker saved a new interval."""
+    service = PollingService(config_class=test_config, api_client=Mock())
+    
+    with patch('polling_service.SettingsManager.get_polling_interval', return_value=service.polling_interval), \
+         patch.object(service, 'update_polling_interval') as mock_update:
+        service._settings_check_job()
+        mock_update.assert_not_called()
+    
+    with patch('polling_service.SettingsManager.get_polling_interval', return_value=service.polling_interval + 5), \
+         patch.object(service, 'update_polling_interval') as mock_update:
+        service._settings_check_job()
+        mock_update.assert_called_once_with(service.polling_interval + 5)